@@ -0,0 +1,194 @@
+"""
+Contains routines to read avalanche files of any length in chunks. The
+avalanches are counted in a table of distinct values, from which histograms
+and fits are computed without holding the whole file in memory.
+
+Two formats are understood: the binary records written by forestfire.stream
+('.bin'), which are memory mapped, and the text files of integer values
+written with savetxt by forestfire_main.py, which are parsed chunk by chunk.
+"""
+import os
+
+from itertools import islice
+
+import numpy as np
+
+from forestfire.stream import AVALANCHE_DTYPE
+
+# the number of avalanches read at once
+CHUNK_SIZE = 2 ** 22
+# values below this limit are counted in a dense array
+DENSE_LIMIT = 2 ** 20
+
+
+def read_chunks(path, field="size", chunk_size=CHUNK_SIZE, offset=0):
+    """
+    Read the values of an avalanche file chunk by chunk. Only complete
+    records are read, so a file can be read while it is written to.
+
+    Args:
+        path(str): The path of the file.
+        field(str): The field of the binary records to read, 'size' or
+            'duration'. Text files hold a single column.
+        chunk_size(int): The number of values per chunk.
+        offset(int): The byte at which to start reading. It has to be the
+            end of a record, as returned by an earlier read.
+
+    Returns:
+        generator: Pairs of an array of at most chunk_size integer values
+            and the byte offset after the last record of the chunk.
+
+    """
+    if path.endswith(".bin"):
+        nrecords = (os.path.getsize(path) - offset) // AVALANCHE_DTYPE.itemsize
+        # an empty range cannot be memory mapped
+        if nrecords <= 0:
+            return
+        records = np.memmap(path, dtype=AVALANCHE_DTYPE, mode="r",
+                            offset=offset, shape=(nrecords, ))
+        for start in range(0, nrecords, chunk_size):
+            stop = min(start + chunk_size, nrecords)
+            yield (np.asarray(records[field][start:stop]),
+                   offset + stop * AVALANCHE_DTYPE.itemsize)
+        return
+
+    with open(path, "rb") as file:
+        file.seek(offset)
+        while True:
+            lines = list(islice(file, chunk_size))
+            # a line without its newline is still being written
+            if lines and not lines[-1].endswith(b"\n"):
+                lines.pop()
+            if not lines:
+                break
+            offset += sum(len(line) for line in lines)
+            values = np.loadtxt(lines, ndmin=1)
+            integers = np.rint(values).astype(np.int64)
+            if np.any(integers != values):
+                raise ValueError(f"{path} does not hold integer values")
+            yield integers, offset
+
+
+class ValueTable:
+    """
+    Counts how often every distinct value occurs. Small values are counted
+    in a dense array, the rare large ones of a heavy tail in a sorted table.
+    """
+
+    def __init__(self):
+        """Initialise an empty table. """
+        self.dense = np.zeros(DENSE_LIMIT, dtype=np.int64)
+        self.large_values = np.empty(0, dtype=np.int64)
+        self.large_counts = np.empty(0, dtype=np.int64)
+
+    def add(self, values):
+        """
+        Count values.
+
+        Args:
+            values(np.ndarray): Non-negative integer values.
+
+        """
+        values = np.asarray(values, dtype=np.int64)
+        if values.size and values.min() < 0:
+            raise ValueError("Avalanche sizes and durations cannot be negative")
+        small = values < DENSE_LIMIT
+        self.dense += np.bincount(values[small], minlength=DENSE_LIMIT)
+
+        large = values[~small]
+        if large.size:
+            self._add_large(*np.unique(large, return_counts=True))
+
+    def _add_large(self, values, counts):
+        """Merge distinct values above DENSE_LIMIT into the sorted table"""
+        self.large_values, index = np.unique(
+            np.concatenate((self.large_values, values)), return_inverse=True
+        )
+        self.large_counts = np.bincount(
+            index, weights=np.concatenate((self.large_counts, counts))
+        ).astype(np.int64)
+
+    def add_counts(self, values, counts):
+        """
+        Add a table of counted values.
+
+        Args:
+            values(np.ndarray): Distinct non-negative integer values.
+            counts(np.ndarray): How often each value occured.
+
+        """
+        values = np.asarray(values, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.int64)
+        small = values < DENSE_LIMIT
+        self.dense[values[small]] += counts[small]
+        if not np.all(small):
+            self._add_large(values[~small], counts[~small])
+
+    def merge(self, other):
+        """
+        Add the counts of another table.
+
+        Args:
+            other(ValueTable): The table to add.
+
+        """
+        self.add_counts(*other.get())
+
+    def get(self):
+        """
+        Get the distinct values and how often they occured.
+
+        Returns:
+            tuple: The sorted values and their counts.
+
+        """
+        small = np.flatnonzero(self.dense)
+        return (np.concatenate((small, self.large_values)),
+                np.concatenate((self.dense[small], self.large_counts)))
+
+    @property
+    def total(self):
+        """The number of counted values. """
+        return int(self.dense.sum() + self.large_counts.sum())
+
+
+def count_values(path, field="size", chunk_size=CHUNK_SIZE):
+    """
+    Count the values of an avalanche file in a single pass.
+
+    Args:
+        path(str): The path of the file.
+        field(str): The field of binary records to read.
+        chunk_size(int): The number of values read at once.
+
+    Returns:
+        ValueTable: The counted values.
+
+    """
+    table = ValueTable()
+    for chunk, _ in read_chunks(path, field, chunk_size):
+        table.add(chunk)
+    return table
+
+
+def log_histogram(values, counts, nbins, shift=1):
+    """
+    Compute a histogram with logarithmic bins from a table of values.
+
+    Args:
+        values(np.ndarray): The distinct values.
+        counts(np.ndarray): How often each value occured.
+        nbins(int): The number of bin edges between 1 and the largest value.
+        shift(int): Added to the values before binning, so that avalanches
+            of size zero fall into the first bin.
+
+    Returns:
+        tuple: The counts per bin divided by the width of the bin, the bin
+            edges and the geometric centres of the bins.
+
+    """
+    bin_edges = np.logspace(0, np.log10(np.max(values)), nbins)
+    binned, bin_edges = np.histogram(values + shift, bins=bin_edges,
+                                     weights=counts)
+    bin_centres = np.sqrt(bin_edges[1:] * bin_edges[:-1])
+    return binned / np.diff(bin_edges), bin_edges, bin_centres
@@ -0,0 +1,110 @@
+"""
+Contains a cache for the analysis of avalanche files which keep growing
+while a simulation appends to them. The table of counted values is saved
+together with the byte offset up to which the file was read, so the next
+analysis only reads the records appended since. The table holds everything
+the histograms and the power law fits need.
+
+A cache entry belongs to a file through its path, device and inode. It is
+only reused if the file did not shrink and the bytes at its start and before
+the offset are unchanged, otherwise the file is read from the beginning.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from analysis.avalanches import CHUNK_SIZE, ValueTable, read_chunks
+
+CACHE_DIRECTORY = ".analysis_cache"
+# the number of bytes compared to detect a rewritten file
+FINGERPRINT_BYTES = 4096
+
+
+def cache_path(path, field, cache=CACHE_DIRECTORY):
+    """
+    Get the path of the cache entry of an avalanche file.
+
+    Args:
+        path(str): The path of the avalanche file.
+        field(str): The field of the binary records which is counted.
+        cache(str): The directory of the cache.
+
+    Returns:
+        str: The path of the cache entry.
+
+    """
+    status = os.stat(path)
+    identity = json.dumps([os.path.abspath(path), status.st_dev,
+                           status.st_ino, field])
+    return os.path.join(cache,
+                        hashlib.sha256(identity.encode()).hexdigest() + ".npz")
+
+
+def fingerprint(path, offset):
+    """
+    Hash the bytes at the start of a file and before an offset.
+
+    Args:
+        path(str): The path of the file.
+        offset(int): The end of the bytes already read.
+
+    Returns:
+        str: The hex digest of the bytes.
+
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        digest.update(file.read(min(offset, FINGERPRINT_BYTES)))
+        file.seek(max(offset - FINGERPRINT_BYTES, 0))
+        digest.update(file.read(min(offset, FINGERPRINT_BYTES)))
+    return digest.hexdigest()
+
+
+def _load_entry(path, entry):
+    """Read a cache entry if it still matches the file"""
+    if not os.path.exists(entry):
+        return ValueTable(), 0
+    with np.load(entry) as saved:
+        offset = int(saved["offset"])
+        if offset > os.path.getsize(path) \
+                or str(saved["fingerprint"]) != fingerprint(path, offset):
+            return ValueTable(), 0
+        table = ValueTable()
+        table.add_counts(saved["values"], saved["counts"])
+    return table, offset
+
+
+def load_table(path, field="size", cache=CACHE_DIRECTORY,
+               chunk_size=CHUNK_SIZE):
+    """
+    Count the values of an avalanche file, reading only the records appended
+    since the last call, and update the cache.
+
+    Args:
+        path(str): The path of the avalanche file.
+        field(str): The field of binary records to read.
+        cache(str): The directory of the cache.
+        chunk_size(int): The number of values read at once.
+
+    Returns:
+        ValueTable: The counted values of the whole file.
+
+    """
+    entry = cache_path(path, field, cache)
+    table, start = _load_entry(path, entry)
+    offset = start
+    for chunk, offset in read_chunks(path, field, chunk_size, start):
+        table.add(chunk)
+    if offset == start and os.path.exists(entry):
+        return table
+
+    os.makedirs(cache, exist_ok=True)
+    values, counts = table.get()
+    temporary_path = entry + f".{os.getpid()}.tmp.npz"
+    np.savez(temporary_path, values=values, counts=counts, offset=offset,
+             fingerprint=fingerprint(path, offset))
+    # only complete entries ever appear under the final name
+    os.replace(temporary_path, entry)
+    return table
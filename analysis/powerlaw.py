@@ -0,0 +1,274 @@
+"""
+Contains a maximum likelihood fit of a discrete power law
+
+    p(x) = x^-alpha / zeta(alpha, x_min)    for x >= x_min
+
+to a table of counted values, as produced by analysis.avalanches. The lower
+bound x_min is the candidate whose fit has the smallest Kolmogorov-Smirnov
+distance to the data (Clauset, Shalizi and Newman 2009). All candidates are
+fitted at once on a grid of exponents which is refined around the maximum,
+and the distances of all candidates come from cumulative sums over the
+sorted counts. Confidence intervals come from bootstrap samples, drawn as
+multinomial counts of the distinct values and fitted a block of samples at a
+time in a pool of processes.
+"""
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from scipy.special import zeta
+
+# the coarse grid of exponents and the number of times it is refined tenfold
+ALPHA_GRID = np.linspace(1.01, 6.0, 200)
+REFINEMENTS = 3
+# the most candidates for x_min and the fewest values above a candidate
+MAX_CANDIDATES = 30
+MIN_TAIL = 50
+# from this argument on, three terms of the Euler-Maclaurin series give the
+# Hurwitz zeta function to double precision
+ZETA_SERIES_FROM = 100
+# the most model probabilities evaluated at once, which sets how many
+# bootstrap samples are fitted together
+BLOCK_SIZE = 2 ** 20
+
+
+def _tail_sums(values, counts):
+    """The number of values and the sum of their logarithms from each index on"""
+    tail_size = np.cumsum(counts[..., ::-1], axis=-1)[..., ::-1]
+    log_sum = np.cumsum((counts * np.log(values))[..., ::-1], axis=-1)
+    log_sum = log_sum[..., ::-1]
+    return tail_size, log_sum
+
+
+def _candidates(values, tail_size, max_candidates, min_tail):
+    """Indices of distinct values spaced evenly on a log scale"""
+    last = np.flatnonzero(tail_size >= min_tail)
+    if last.size == 0:
+        raise ValueError(f"At least {min_tail} values are needed for a fit")
+    last = last[-1]
+    targets = np.geomspace(values[0], values[last], max_candidates)
+    return np.unique(np.minimum(np.searchsorted(values, targets), last))
+
+
+def _prepare(values, counts, shift=1, max_candidates=MAX_CANDIDATES,
+             min_tail=MIN_TAIL):
+    """The shifted values from one on, their counts and the candidates"""
+    values = np.asarray(values, dtype=np.float64) + shift
+    counts = np.asarray(counts)
+    positive = values >= 1
+    values, counts = values[positive], counts[positive]
+    tail_size, _ = _tail_sums(values, counts)
+    return values, counts, _candidates(values, tail_size, max_candidates,
+                                       min_tail)
+
+
+def _segments(size, candidates):
+    """The indices from each candidate to the last value, one after another"""
+    lengths = size - candidates
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    segment = np.repeat(np.arange(candidates.size), lengths)
+    positions = np.arange(lengths.sum()) + (candidates - starts)[segment]
+    return positions, segment, starts
+
+
+def _zeta(alpha, x):
+    """The Hurwitz zeta function for one exponent per entry and x per column"""
+    result = np.empty(alpha.shape)
+    small = x < ZETA_SERIES_FROM
+    result[:, small] = zeta(alpha[:, small], x[small])
+    alpha, x = alpha[:, ~small], x[~small]
+    correction = (1 - (alpha + 3) * (alpha + 4) / (42 * x ** 2))
+    correction = 1 - (alpha + 1) * (alpha + 2) / (60 * x ** 2) * correction
+    result[:, ~small] = x ** -alpha * (x / (alpha - 1) + 0.5
+                                       + alpha / (12 * x) * correction)
+    return result
+
+
+def estimate_alpha(x_min, tail_size, log_sum):
+    """
+    Maximise the likelihood of the exponent for several lower bounds at once.
+
+    Args:
+        x_min(np.ndarray): The lower bounds.
+        tail_size(np.ndarray): The number of values from each lower bound on.
+            Further leading axes hold further samples.
+        log_sum(np.ndarray): The sum of the logarithms of these values.
+
+    Returns:
+        np.ndarray: The exponent for each lower bound and sample.
+
+    """
+    def log_likelihood(alpha):
+        return -alpha * log_sum - tail_size * np.log(zeta(alpha, x_min))
+
+    # the coarse grid does not depend on the samples, so the normalisations
+    # are only evaluated once per lower bound
+    shape = (-1,) + (1,) * np.ndim(tail_size)
+    alpha = ALPHA_GRID[np.argmax(log_likelihood(ALPHA_GRID.reshape(shape)),
+                                 axis=0)]
+    step = ALPHA_GRID[1] - ALPHA_GRID[0]
+    for _ in range(REFINEMENTS):
+        grid = np.maximum(alpha + np.linspace(-step, step, 21).reshape(shape),
+                          ALPHA_GRID[0])
+        best = np.argmax(log_likelihood(grid), axis=0)
+        alpha = np.take_along_axis(grid, best[None], axis=0)[0]
+        step /= 10
+    return alpha
+
+
+def ks_distances(values, counts, candidates, alpha):
+    """
+    Compute the Kolmogorov-Smirnov distances between counted values and
+    discrete power laws starting at each candidate lower bound.
+
+    Args:
+        values(np.ndarray): The sorted distinct values.
+        counts(np.ndarray): How often each value occured, one row per sample.
+        candidates(np.ndarray): The indices of the lower bounds.
+        alpha(np.ndarray): The exponent for each sample and lower bound.
+
+    Returns:
+        np.ndarray: The largest difference of the cumulative distributions
+            for each sample and lower bound.
+
+    """
+    positions, segment, starts = _segments(values.size, candidates)
+
+    # the empirical distribution of every tail from one cumulative sum
+    cumulative = np.cumsum(counts, axis=-1)
+    below = cumulative[:, candidates] - counts[:, candidates]
+    tail_size = np.maximum(cumulative[:, -1:] - below, 1)
+    empirical = ((cumulative[:, positions] - below[:, segment])
+                 / tail_size[:, segment])
+
+    # zeta(alpha, v) = zeta(alpha, v + 1) + v^-alpha gives every value needed
+    # from a single evaluation per distinct value
+    exponent = alpha[:, segment]
+    upper = _zeta(exponent, values[positions] + 1.0)
+    at_value = upper + values[positions] ** -exponent
+    norm = at_value[:, starts][:, segment]
+    distance = np.abs(empirical - (1 - upper / norm))
+
+    # the model keeps growing up to the integer before the next value, while
+    # both distributions reach one after the last value of a tail
+    before_next = np.abs(empirical[:, :-1]
+                         - (1 - at_value[:, 1:] / norm[:, :-1]))
+    before_next[:, starts[1:] - 1] = 0
+    np.maximum(distance[:, :-1], before_next, out=distance[:, :-1])
+    return np.maximum.reduceat(distance, starts, axis=1)
+
+
+def _fit(values, counts, candidates, min_tail):
+    """Fit each row of counts at the candidate of the smallest distance"""
+    tail_size, log_sum = _tail_sums(values, counts)
+    tail_size, log_sum = tail_size[:, candidates], log_sum[:, candidates]
+    alpha = estimate_alpha(values[candidates], tail_size, log_sum)
+    distances = ks_distances(values, counts, candidates, alpha)
+    distances[tail_size < min_tail] = np.inf
+    best = np.argmin(distances, axis=1)[:, None]
+    return (np.take_along_axis(alpha, best, axis=1)[:, 0],
+            candidates[best[:, 0]],
+            np.take_along_axis(distances, best, axis=1)[:, 0],
+            np.take_along_axis(tail_size, best, axis=1)[:, 0])
+
+
+def fit_power_law(values, counts, shift=1, max_candidates=MAX_CANDIDATES,
+                  min_tail=MIN_TAIL):
+    """
+    Fit a discrete power law to a table of counted values.
+
+    Args:
+        values(np.ndarray): The sorted distinct values.
+        counts(np.ndarray): How often each value occured.
+        shift(int): Added to the values before the fit, so that avalanches
+            of size zero can be included.
+        max_candidates(int): The most lower bounds to try.
+        min_tail(int): The fewest values above a lower bound.
+
+    Returns:
+        dict: The exponent, the lower bound, the Kolmogorov-Smirnov distance
+            and the number of values above the lower bound.
+
+    """
+    values, counts, candidates = _prepare(values, counts, shift,
+                                          max_candidates, min_tail)
+    alpha, index, distance, tail_size = _fit(values, counts[None], candidates,
+                                             min_tail)
+    return {
+        "alpha": float(alpha[0]),
+        "x min": float(values[index[0]]) - shift,
+        "ks distance": float(distance[0]),
+        "tail size": int(tail_size[0])
+    }
+
+
+def _bootstrap(values, counts, candidates, nsamples, seed, min_tail):
+    """Fit nsamples bootstrap samples drawn from the counts, block by block"""
+    rng = np.random.default_rng(seed)
+    total = int(counts.sum())
+    probabilities = counts / total
+    block = max(1, BLOCK_SIZE // int(np.sum(values.size - candidates)))
+    alpha = np.empty(nsamples)
+    index = np.empty(nsamples, dtype=np.int64)
+    for start in range(0, nsamples, block):
+        samples = rng.multinomial(total, probabilities,
+                                  size=min(block, nsamples - start))
+        rows = slice(start, start + len(samples))
+        alpha[rows], index[rows], _, _ = _fit(values, samples, candidates,
+                                              min_tail)
+    return alpha, index
+
+
+def bootstrap_power_law(values, counts, nsamples=1000, workers=None,
+                        seed=None, **options):
+    """
+    Fit bootstrap samples of a table of counted values in parallel. The
+    samples are fitted with the candidates for the lower bound of the data.
+
+    Args:
+        values(np.ndarray): The sorted distinct values.
+        counts(np.ndarray): How often each value occured.
+        nsamples(int): The number of bootstrap samples.
+        workers(int or None): The number of processes. Defaults to None
+            meaning one process per cpu.
+        seed(int or None): The seed of the random number generators.
+        options: Passed on to fit_power_law.
+
+    Returns:
+        dict: The exponent and the lower bound of every bootstrap sample.
+
+    """
+    workers = workers if workers is not None else os.cpu_count()
+    shift = options.get("shift", 1)
+    min_tail = options.get("min_tail", MIN_TAIL)
+    values, counts, candidates = _prepare(values, counts, **options)
+    nchunks = min(nsamples, 4 * workers)
+    sizes = np.diff(np.linspace(0, nsamples, nchunks + 1).astype(int))
+    seeds = np.random.SeedSequence(seed).spawn(nchunks)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        fits = list(executor.map(
+            _bootstrap, [values] * nchunks, [counts] * nchunks,
+            [candidates] * nchunks, sizes.tolist(), seeds, [min_tail] * nchunks
+        ))
+    alpha = np.concatenate([fit[0] for fit in fits])
+    index = np.concatenate([fit[1] for fit in fits])
+    return {"alpha": alpha, "x min": values[index] - shift}
+
+
+def confidence_interval(samples, level=0.95):
+    """
+    Get the central interval of bootstrap samples.
+
+    Args:
+        samples(np.ndarray): The values of the bootstrap samples.
+        level(float): The fraction of samples inside the interval.
+
+    Returns:
+        tuple: The lower and the upper end of the interval.
+
+    """
+    lower, upper = np.quantile(samples, [(1 - level) / 2, (1 + level) / 2])
+    return float(lower), float(upper)
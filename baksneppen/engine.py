@@ -44,6 +44,7 @@ class BakSneppenEngine(SimulationEngine):
         self.running = False
         self.clear_figure()
         self.model.clear()
+        self.reset_frame_pacing()
         self.running = True
         self.simulate()
 
@@ -51,15 +52,6 @@ class BakSneppenEngine(SimulationEngine):
         """Stop the simulation. """
         self.running = False
 
-    def simulate(self):
-        """Advance the simulation. """
-        if self.running:
-            self.model.update()
-            self.timeText.set(f"t = {self.model.time}")
-            if not self.silent:
-                self.visualise()
-            self.after(1, self.simulate)
-
     def set_silent(self):
         """Toggles the visualisation of the simulation. """
         self.silent = not self.silent
@@ -68,6 +60,7 @@ class BakSneppenEngine(SimulationEngine):
     def change_size(self, size):
         """Change the size of the simulation. """
         self.model.set_size(size)
+        self.reset_frame_pacing()
 
     def set_updatemode(self, updatemode):
         """
@@ -80,6 +73,7 @@ class BakSneppenEngine(SimulationEngine):
 
         """
         self.model.set_updatemode(updatemode)
+        self.reset_frame_pacing()
 
     def export_data(self):
         """Export the measured data as well as a snapshot of the current figure. """
@@ -1,27 +1,48 @@
+from functools import partial
 from sys import argv
 
+import numpy as np
+
 from numpy import savetxt
 
 from baksneppen.model import BakSneppenModel
 
-try:
-    from baksneppen.engine import BakSneppenEngine
-    TKINTER_INSTALLED = True
-except ImportError as err:
-    ERRMSG = "\n".join((
-        "Import Error: {}\n".format(err),
-        "Install python-tkinter if you want to use the graphical user interface.",
-        "(sudo apt-get install python3-tk).",
-        "You may also run the script over the command line by adding 'nogui' " \
-        "and supply the system size (-s), the update algorithm (-m) and the " \
-        "number of updates (-u) as command line arguments. If no number of " \
-        "updates is supplied the script will run until it is faces a Keyboard " \
-        "interrupt (Ctrl + C)\n",
-        "Example: main.py nogui -s=1000 -u=10000"
-    ))
-    TKINTER_INSTALLED = False
+ERRMSG = "\n".join((
+    "Import Error: {}\n",
+    "Install python-tkinter if you want to use the graphical user interface.",
+    "(sudo apt-get install python3-tk).",
+    "You may also run the script over the command line by adding 'nogui' " \
+    "and supply the system size (-s), the update algorithm (-m) and the " \
+    "number of updates (-u) as command line arguments. If no number of " \
+    "updates is supplied the script will run until it is faces a Keyboard " \
+    "interrupt (Ctrl + C)\n",
+    "Add --monitor=<port> to serve live metrics of the run over http.",
+    "Example: main.py nogui -s=1000 -u=10000"
+))
 
 DEFAULT_SYSTEM_SIZE = 16
+# bins for the histogram of the log10 avalanche durations
+MONITOR_BINS = np.arange(0, 7, 0.3)
+
+
+def load_engine():
+    """
+    Import the graphical user interface. This is deferred until it is needed,
+    so that runs without it do not pay for loading tkinter and matplotlib.
+
+    Args:
+        None.
+
+    Returns:
+        type or None: The engine class or None if tkinter is not installed.
+
+    """
+    try:
+        from baksneppen.engine import BakSneppenEngine
+    except ImportError as err:
+        print(ERRMSG.format(err))
+        return None
+    return BakSneppenEngine
 
 
 def _convert(string_value, conversion_type):
@@ -60,22 +81,57 @@ def parse_command_line_args():
     size = DEFAULT_SYSTEM_SIZE
     nupdates = None
     mode = 1
+    monitor_address = None
     # the first command line argument is always the name of the script.
     command_line_args = argv[1:]
 
     for arg in command_line_args:
         if "nogui" in arg:
             use_gui = False
+        elif arg.startswith("--monitor="):
+            monitor_address = arg.split("=", 1)[1]
         elif "-s" in arg:
             size = _convert(arg.split("=")[1], int)
         elif "-u" in arg:
             nupdates = _convert(arg.split("=")[1], int)
         elif "-m" in arg:
             mode = _convert(arg.split("=")[1], int)
-    return use_gui, size, mode, nupdates
+    return use_gui, size, mode, nupdates, monitor_address
+
+
+def describe(model, histogram=None):
+    """
+    Collect the metrics of a running Bak-Sneppen simulation.
+
+    Args:
+        model(BakSneppenModel): The model of the simulation.
+        histogram(RunningHistogram or None): The running histogram of the
+            avalanche durations kept between requests. Defaults to None
+            meaning all durations are counted again.
 
+    Returns:
+        dict: The metrics of the simulation.
 
-def nogui_simulation(size, updatemode, nupdates):
+    """
+    from simulations.monitor import RunningHistogram
+
+    # the first entry is not a complete avalanche
+    histogram = histogram or RunningHistogram(MONITOR_BINS, offset=1)
+    return {
+        "system size": model.size,
+        "least fitness": float(model.least_fitness),
+        "avalanche durations": histogram.update(model.avalanche_durations)
+    }
+
+
+def snapshot(model):
+    """Get a downsampled copy of the fitness of the species. """
+    from simulations.monitor import downsample
+
+    return downsample(model.species)
+
+
+def nogui_simulation(size, updatemode, nupdates, monitor_address=None):
     """
     Simulation without the graphical user interface.
 
@@ -86,6 +142,8 @@ def nogui_simulation(size, updatemode, nupdates):
             2 - kill one random neighbour
         nupdates(int): The number of updates to perform. If nupdates is None
             an infinite while loop will be started until interrupted.
+        monitor_address(str or None): If given, serve live metrics of the
+            simulation on this address, see simulations.monitor.
 
     Returns:
         None.
@@ -95,6 +153,22 @@ def nogui_simulation(size, updatemode, nupdates):
     model.set_size(size)
     model.set_updatemode(updatemode)
 
+    monitor = None
+    if monitor_address is not None:
+        from simulations.monitor import MonitorServer, RunningHistogram
+
+        histogram = RunningHistogram(MONITOR_BINS, offset=1)
+        monitor = MonitorServer(model, partial(describe, histogram=histogram),
+                                snapshot, monitor_address)
+        try:
+            monitor.start()
+        except OSError as err:
+            # e.g. the port is used by another run, which is no reason to
+            # lose this one
+            print(f"Could not serve metrics on {monitor_address}: {err}. "
+                  "Continuing without the monitor.")
+            monitor = None
+
     if nupdates is not None:
         for update in range(nupdates):
             model.update()
@@ -112,6 +186,9 @@ def nogui_simulation(size, updatemode, nupdates):
                 print(f"completed {model.time} iterations.")
                 print(f"l = {model.least_fitness}")
 
+    if monitor is not None:
+        monitor.stop()
+
     data = model.get_data()
     meta_info = ", ".join((
         f"t = {data['time']}", f"n = {data['system size']}"
@@ -124,22 +201,22 @@ def nogui_simulation(size, updatemode, nupdates):
 
 def main():
     """Main function of the script. """
-    use_gui, size, mode, nupdates = parse_command_line_args()
-
-    if use_gui and not TKINTER_INSTALLED:
-        print(ERRMSG)
-        return
+    use_gui, size, mode, nupdates, monitor_address = parse_command_line_args()
 
     if use_gui:
-        if any([p is not None for p in (nupdates, )]):
+        engine_class = load_engine()
+        if engine_class is None:
+            return
+
+        if any([p is not None for p in (nupdates, monitor_address)]):
             print("Warning: Some command line parameters are ignored.")
 
-        engine = BakSneppenEngine()
+        engine = engine_class()
         engine.change_size(size)
         engine.set_updatemode(mode)
         engine.mainloop()
     else:
-        nogui_simulation(size, mode, nupdates)
+        nogui_simulation(size, mode, nupdates, monitor_address)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,25 @@
+"""
+Run a batch of simulations described by a JSON job file, skipping all jobs
+whose results are already cached. See simulations/batch.py for the format of
+the job file.
+
+Example: batch_main.py jobs.json
+"""
+from sys import argv
+
+from simulations.batch import read_job_file, run_batch
+
+
+def main():
+    """Main function of the script. """
+    if len(argv) != 2:
+        print(__doc__)
+        return
+
+    jobs, cache, workers = read_job_file(argv[1])
+    results = run_batch(jobs, cache, workers)
+    print(f"{len(results)} results available in '{cache}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Measure how the parallel backends of the forest fire model scale with the
+number of workers. Every backend runs the same forest for an increasing
+number of workers, and the median time per update is compared with the
+serial 'dense' backend.
+
+Example: benchmark_backends.py -s=4096 -u=20 -r=3 -j=8 -b=processes
+"""
+import os
+import sys
+
+from statistics import median
+from time import perf_counter
+
+import numpy as np
+
+from forestfire.model import ForestFireModel
+
+PARALLEL_BACKENDS = ("threads", "processes")
+DEFAULT_SIZE = 4096
+DEFAULT_UPDATES = 20
+DEFAULT_REPEATS = 3
+# a forest half full of trees with a few fires, which keeps all cells busy
+TREE_GROWTH = 0.01
+LIGHTNING = 1e-5
+
+
+def measure(backend, size, nupdates, workers=None, seed=0):
+    """
+    Time the updates of one backend.
+
+    Args:
+        backend(str): The backend of the model.
+        size(int): The number of cells per side of the forest.
+        nupdates(int): The number of updates to time.
+        workers(int or None): The number of threads or processes.
+        seed(int): The seed of the forest and the updates.
+
+    Returns:
+        float: The seconds per update.
+
+    """
+    np.random.seed(seed)
+    model = ForestFireModel(size, LIGHTNING, TREE_GROWTH, updatemode=1,
+                            backend=backend, workers=workers)
+    model.forest[:] = np.random.choice(np.array([0, 1], dtype=np.int8),
+                                       size=model.forest.shape)
+    model.count_cells()
+    try:
+        # the first update starts the workers
+        model.update()
+        start = perf_counter()
+        for _ in range(nupdates):
+            model.update()
+        return (perf_counter() - start) / nupdates
+    finally:
+        model.release_workers()
+
+
+def worker_counts(max_workers):
+    """The powers of two up to max_workers and max_workers itself. """
+    counts = [1]
+    while 2 * counts[-1] < max_workers:
+        counts.append(2 * counts[-1])
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+    return counts
+
+
+def main():
+    """Main function of the script. """
+    size = DEFAULT_SIZE
+    nupdates = DEFAULT_UPDATES
+    repeats = DEFAULT_REPEATS
+    max_workers = os.cpu_count()
+    backends = PARALLEL_BACKENDS
+    for arg in sys.argv[1:]:
+        name, _, value = arg.partition("=")
+        if name == "-s":
+            size = int(value)
+        elif name == "-u":
+            nupdates = int(value)
+        elif name == "-r":
+            repeats = int(value)
+        elif name == "-j":
+            max_workers = int(value)
+        elif name == "-b":
+            backends = tuple(value.split(","))
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    print(f"{size}x{size} forest, {nupdates} updates, median of {repeats} "
+          f"runs, {os.cpu_count()} cpus")
+    serial = median(measure("dense", size, nupdates) for _ in range(repeats))
+    print(f"{'dense':<10} {'':>7} {serial * 1000:9.1f} ms per update")
+    for backend in backends:
+        for workers in worker_counts(max_workers):
+            seconds = median(measure(backend, size, nupdates, workers)
+                             for _ in range(repeats))
+            speedup = serial / seconds
+            print(f"{backend:<10} {workers:>3} x   {seconds * 1000:9.1f} ms "
+                  f"per update, speedup {speedup:5.2f}, "
+                  f"efficiency {speedup / workers:4.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Measure the start-up cost of short runs without the graphical user interface
+and check that they do not load the modules only needed for the interface.
+
+Example: check_startup.py -r=5 -l=0.5
+"""
+import json
+import os
+import subprocess
+import sys
+
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+# modules which must not be imported by a nogui run
+FORBIDDEN_MODULES = ("tkinter", "matplotlib", "scipy", "asyncio")
+ENTRY_POINTS = {
+    "baksneppen_main.py": ["nogui", "-s=16", "-u=1"],
+    "forestfire_main.py": ["nogui", "-s=8", "-u=1"]
+}
+DEFAULT_REPEATS = 5
+
+# runs an entry point in a fresh interpreter and reports the time it took
+# together with the top-level modules that were loaded
+PROBE = """
+import json, runpy, sys
+from time import perf_counter
+start = perf_counter()
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+elapsed = perf_counter() - start
+sys.stderr.write(json.dumps({
+    "time": elapsed,
+    "modules": sorted({name.split(".")[0] for name in sys.modules})
+}))
+"""
+
+
+def measure(script, arguments):
+    """
+    Run an entry point in a fresh interpreter inside a temporary directory.
+
+    Args:
+        script(str): Path to the entry point.
+        arguments(list): The command line arguments for the entry point.
+
+    Returns:
+        tuple: The wall time of the whole interpreter run, the time spent in
+            the entry point and the names of the loaded top-level modules.
+
+    """
+    environment = dict(os.environ, PYTHONPATH=os.path.dirname(script))
+    with TemporaryDirectory() as directory:
+        start = perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE, script] + arguments, cwd=directory,
+            env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            check=True, text=True
+        )
+        wall_time = perf_counter() - start
+    report = json.loads(result.stderr.strip().splitlines()[-1])
+    return wall_time, report["time"], report["modules"]
+
+
+def main():
+    """Main function of the script. """
+    repeats = DEFAULT_REPEATS
+    limit = None
+    for arg in sys.argv[1:]:
+        if "-r" in arg:
+            repeats = int(arg.split("=")[1])
+        elif "-l" in arg:
+            limit = float(arg.split("=")[1])
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    failed = False
+    for script, arguments in ENTRY_POINTS.items():
+        measurements = [measure(os.path.join(root, script), arguments)
+                        for _ in range(repeats)]
+        wall_time = median(m[0] for m in measurements)
+        run_time = median(m[1] for m in measurements)
+        loaded = [m for m in FORBIDDEN_MODULES if m in measurements[0][2]]
+
+        print(f"{script}: {wall_time:.3f} s total, {run_time:.3f} s in script")
+        if loaded:
+            print(f"  loaded modules only needed for the gui: {', '.join(loaded)}")
+            failed = True
+        if limit is not None and wall_time > limit:
+            print(f"  exceeds the limit of {limit:.3f} s")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 """Contains routines to determine a cells state"""
+import numpy as np
 
 SOIL = 0
 FIRE = -1
@@ -19,12 +20,37 @@ def is_tree(cell):
 
 def neighbours_are_burning(trees, row, col):
     """
+    Check whether any of the four nearest neighbours of a cell is burning.
+    Cells outside of the forest count as not burning.
     """
     neighbours = [
-        trees[row - 1, col] if row - 1 > 0 else None, # upper neighbour
+        trees[row - 1, col] if row - 1 >= 0 else None, # upper neighbour
         trees[row + 1, col] if row + 1 < trees.shape[0] else None, # lower neighbour
-        trees[row, col - 1] if col - 1 > 0 else None, # left neighbour
+        trees[row, col - 1] if col - 1 >= 0 else None, # left neighbour
         trees[row, col + 1] if col + 1 < trees.shape[1] else None # right neighbour
     ]
 
     return True if any(is_burning(n) for n in neighbours) else False
+
+
+def burning_neighbours(forest):
+    """
+    Find all cells with at least one burning nearest neighbour by comparing
+    shifted views of the forest. Cells outside of the forest count as not
+    burning.
+
+    Args:
+        forest(np.ndarray): The cell states. The last two axes are the rows
+            and columns of the forest.
+
+    Returns:
+        np.ndarray: True for every cell next to a fire.
+
+    """
+    burning = is_burning(forest)
+    neighbours = np.zeros(forest.shape, dtype=bool)
+    neighbours[..., 1:, :] |= burning[..., :-1, :] # upper neighbour
+    neighbours[..., :-1, :] |= burning[..., 1:, :] # lower neighbour
+    neighbours[..., :, 1:] |= burning[..., :, :-1] # left neighbour
+    neighbours[..., :, :-1] |= burning[..., :, 1:] # right neighbour
+    return neighbours
@@ -0,0 +1,419 @@
+"""
+Contains routines for following individual fires and connected clusters of
+trees in the forest fire model with union-find structures.
+"""
+import numpy as np
+
+from forestfire import cell_state
+
+INITIAL_CAPACITY = 1024
+# below 1 / REJECTION_LIMIT of all cells in the requested state, cells are
+# sampled from a StateIndex instead of by rejection
+REJECTION_LIMIT = 20
+
+
+def neighbour_indices(cells, shape):
+    """
+    Get the flat indices of the four nearest neighbours of cells.
+
+    Args:
+        cells(np.ndarray): Flat indices of cells in a forest.
+        shape(tuple): The shape of the forest.
+
+    Returns:
+        tuple: The flat indices of the neighbours as an (n x 4) array and a
+            mask which is False for neighbours outside of the forest.
+
+    """
+    nrows, ncols = shape
+    rows, cols = np.divmod(cells, ncols)
+    neighbours = np.stack((cells - ncols, cells + ncols, cells - 1, cells + 1),
+                          axis=1)
+    inside = np.stack((rows > 0, rows < nrows - 1, cols > 0, cols < ncols - 1),
+                      axis=1)
+    return np.where(inside, neighbours, 0), inside
+
+
+class FireTracker:
+    """
+    Labels every burning cell with the fire it belongs to. A tree ignited by
+    burning neighbours joins their fire, merging fires if the neighbours
+    belong to different ones, and a tree without burning neighbours starts
+    a new fire. A fire is complete once none of its cells burn anymore.
+    """
+
+    def __init__(self, shape):
+        """
+        Initialise the tracker.
+
+        Args:
+            shape(tuple): The shape of the forest.
+
+        """
+        self.shape = tuple(shape)
+        # label of the fire for every burning cell, 0 for all other cells
+        self.labels = np.zeros(self.shape, dtype=np.int32)
+        self.burning = np.empty(0, dtype=np.int64)
+        self.parent = np.arange(INITIAL_CAPACITY, dtype=np.int64)
+        self.size = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        self.start = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        self.next_label = 1
+        self.fire_sizes = []
+        self.fire_durations = []
+
+    def find(self, labels):
+        """
+        Find the root label of each given label and compress the paths.
+
+        Args:
+            labels(np.ndarray): The labels to look up.
+
+        Returns:
+            np.ndarray: The root labels.
+
+        """
+        roots = self.parent[labels]
+        while True:
+            grand_parents = self.parent[roots]
+            if np.array_equal(grand_parents, roots):
+                break
+            roots = grand_parents
+        self.parent[labels] = roots
+        return roots
+
+    def union(self, first, second):
+        """Merge the fires with the given labels. """
+        first, second = self.find(np.array([first, second]))
+        if first == second:
+            return
+        if self.size[first] < self.size[second]:
+            first, second = second, first
+        self.parent[second] = first
+        self.size[first] += self.size[second]
+        self.start[first] = min(self.start[first], self.start[second])
+
+    def _reserve(self, count):
+        """Make room for count new labels"""
+        if self.next_label + count <= self.parent.shape[0]:
+            return
+
+        # relabel the fires which are still burning to 1, 2, ...
+        roots = self.find(self.labels.flat[self.burning]) \
+                if self.burning.size else np.empty(0, dtype=np.int64)
+        active, new_labels = np.unique(roots, return_inverse=True)
+        capacity = max(2 * (active.size + count + 1), INITIAL_CAPACITY)
+        size = np.zeros(capacity, dtype=np.int64)
+        start = np.zeros(capacity, dtype=np.int64)
+        size[1:active.size + 1] = self.size[active]
+        start[1:active.size + 1] = self.start[active]
+        self.parent = np.arange(capacity, dtype=np.int64)
+        self.size, self.start = size, start
+        self.labels.flat[self.burning] = new_labels + 1
+        self.next_label = active.size + 1
+
+    def update(self, burning, time):
+        """
+        Label the cells burning after an update and record completed fires.
+
+        Args:
+            burning(np.ndarray): Flat indices of all cells burning after the
+                update. These are exactly the trees ignited during it.
+            time(int): The number of updates performed so far.
+
+        Returns:
+            None.
+
+        """
+        burning = np.asarray(burning, dtype=np.int64)
+        self._reserve(burning.size)
+        flat_labels = self.labels.reshape(-1)
+        previous = self.find(flat_labels[self.burning])
+
+        neighbours, inside = neighbour_indices(burning, self.shape)
+        neighbour_labels = np.where(inside, flat_labels[neighbours], 0)
+        has_fire = neighbour_labels != 0
+        neighbour_labels[has_fire] = self.find(neighbour_labels[has_fire])
+        labels = neighbour_labels.max(axis=1)
+
+        # merge fires meeting in a newly ignited tree
+        cells, sides = np.nonzero(has_fire & (neighbour_labels != labels[:, None]))
+        for first, second in set(zip(labels[cells].tolist(),
+                                     neighbour_labels[cells, sides].tolist())):
+            self.union(first, second)
+
+        # trees without burning neighbours start new fires
+        new_fires = labels == 0
+        labels[new_fires] = np.arange(self.next_label,
+                                      self.next_label + np.count_nonzero(new_fires))
+        self.start[labels[new_fires]] = time
+        self.next_label += np.count_nonzero(new_fires)
+
+        labels = self.find(labels)
+        np.add.at(self.size, labels, 1)
+
+        flat_labels[self.burning] = 0
+        flat_labels[burning] = labels
+        self.burning = burning
+
+        finished = np.setdiff1d(self.find(previous), labels)
+        self.fire_sizes.extend(self.size[finished].tolist())
+        self.fire_durations.extend((time - self.start[finished]).tolist())
+
+
+def distinct_integers(rng, stop, count):
+    """
+    Draw distinct integers from [0, stop) uniformly at random.
+
+    Args:
+        rng(np.random.Generator): The random number generator.
+        stop(int): The end of the range.
+        count(int): The number of integers, at most stop.
+
+    Returns:
+        np.ndarray: The integers.
+
+    """
+    if 8 * count > stop:
+        # a partial shuffle of the whole range is cheaper than rejecting the
+        # many repeated draws
+        return rng.choice(stop, count, replace=False)
+    chosen = np.empty(0, dtype=np.int64)
+    while chosen.size < count:
+        missing = count - chosen.size
+        candidates = rng.integers(0, stop, int(1.1 * missing) + 16)
+        chosen = np.concatenate((chosen, candidates))
+        # keep the first draw of every integer, which keeps the sample uniform
+        _, first = np.unique(chosen, return_index=True)
+        chosen = chosen[np.sort(first)]
+    return chosen[:count]
+
+
+def sample_cells(rng, cells, state, count, available):
+    """
+    Pick distinct cells with a given state uniformly at random. Random cells
+    are drawn and those in the wrong state are rejected, so the cost scales
+    with the number of picked cells rather than the size of the forest. This
+    needs at least 1 / REJECTION_LIMIT of the cells in the given state, use
+    a StateIndex for rarer states.
+
+    Args:
+        rng(np.random.Generator): The random number generator.
+        cells(np.ndarray): The flat forest.
+        state(int): The state of the cells to pick.
+        count(int): The number of cells to pick.
+        available(int): The number of cells in the given state.
+
+    Returns:
+        np.ndarray: The flat indices of the picked cells.
+
+    """
+    count = min(count, available)
+    if count == 0:
+        return np.empty(0, dtype=np.int64)
+
+    chosen = np.empty(0, dtype=np.int64)
+    while chosen.size < count:
+        missing = count - chosen.size
+        candidates = rng.integers(0, cells.size,
+                                  int(1.1 * missing * cells.size / available) + 16)
+        chosen = np.concatenate((chosen, candidates[cells[candidates] == state]))
+        # keep the first draw of every cell, which keeps the sample uniform
+        _, first = np.unique(chosen, return_index=True)
+        chosen = chosen[np.sort(first)]
+    return chosen[:count]
+
+
+class StateIndex:
+    """
+    Picks cells of one state like sample_cells, but keeps the sorted indices
+    of these cells while they are rare, so picking them costs about their
+    number instead of a scan of the forest. The index is built by one scan
+    when the state becomes rare and is then kept up to date with the cells
+    changed by each update. The picked cells only depend on the forest and
+    the random number generator, not on how the index was built.
+    """
+
+    def __init__(self, state):
+        """
+        Args:
+            state(int): The state of the indexed cells.
+
+        """
+        self.state = state
+        self.members = None
+
+    def sample(self, rng, cells, count, available):
+        """
+        Pick distinct cells in the state of the index uniformly at random.
+
+        Args:
+            rng(np.random.Generator): The random number generator.
+            cells(np.ndarray): The flat forest.
+            count(int): The number of cells to pick.
+            available(int): The number of cells in the state.
+
+        Returns:
+            np.ndarray: The flat indices of the picked cells.
+
+        """
+        if available * REJECTION_LIMIT >= cells.size:
+            if available * REJECTION_LIMIT >= 2 * cells.size:
+                # common again, stop keeping the index up to date
+                self.members = None
+            return sample_cells(rng, cells, self.state, count, available)
+
+        count = min(count, available)
+        if count == 0:
+            return np.empty(0, dtype=np.int64)
+        if self.members is None:
+            self.members = np.flatnonzero(cells == self.state)
+        return self.members[distinct_integers(rng, self.members.size, count)]
+
+    def update(self, added=None, removed=None):
+        """
+        Follow cells entering and leaving the state.
+
+        Args:
+            added(np.ndarray or None): Flat indices of cells which changed to
+                the state.
+            removed(np.ndarray or None): Flat indices of cells which left the
+                state. They must have been in it.
+
+        """
+        if self.members is None:
+            return
+        # both move the sorted indices once instead of sorting them again
+        if removed is not None and len(removed):
+            self.members = np.delete(
+                self.members, np.searchsorted(self.members, np.sort(removed))
+            )
+        if added is not None and len(added):
+            added = np.sort(added)
+            self.members = np.insert(self.members,
+                                     np.searchsorted(self.members, added),
+                                     added)
+
+
+class TreeClusters:
+    """
+    Keeps the connected clusters of trees in a forest up to date with a
+    union-find structure over all cells. Growing trees join the clusters of
+    their neighbours and a burnt cluster is removed at a cost proportional to
+    its size.
+    """
+
+    def __init__(self, forest):
+        """
+        Find the clusters of an existing forest.
+
+        Args:
+            forest(np.ndarray): The forest. It must not contain fire.
+
+        """
+        self.shape = forest.shape
+        cells = forest.reshape(-1)
+        self.parent = np.arange(cells.size, dtype=np.int32)
+        self.size = np.ones(cells.size, dtype=np.int32)
+
+        # hook the larger root of every tree-tree edge onto the smaller one
+        # until all edges connect cells with equal roots
+        trees = (cells == cell_state.TREE).reshape(self.shape)
+        index = np.arange(cells.size).reshape(self.shape)
+        edges = np.concatenate((
+            np.stack((index[:, :-1][trees[:, :-1] & trees[:, 1:]],
+                      index[:, 1:][trees[:, :-1] & trees[:, 1:]])),
+            np.stack((index[:-1][trees[:-1] & trees[1:]],
+                      index[1:][trees[:-1] & trees[1:]]))
+        ), axis=1)
+        while edges.size:
+            roots = self._find_all()
+            first, second = roots[edges[0]], roots[edges[1]]
+            differ = first != second
+            edges, first, second = edges[:, differ], first[differ], second[differ]
+            np.minimum.at(self.parent, np.maximum(first, second),
+                          np.minimum(first, second))
+        roots = self._find_all()
+        self.parent[:] = roots
+        self.size[trees.reshape(-1)] = 0
+        np.add.at(self.size, roots[trees.reshape(-1)], 1)
+
+    def _find_all(self):
+        """Point every cell directly to its root by pointer jumping"""
+        parent = self.parent
+        while True:
+            grand_parents = parent[parent]
+            if np.array_equal(grand_parents, parent):
+                return parent
+            parent = grand_parents
+
+    def find(self, cell):
+        """Find the root of the cluster containing a cell. """
+        parent = self.parent
+        root = cell
+        while parent[root] != root:
+            root = parent[root]
+        while parent[cell] != root:
+            parent[cell], cell = root, parent[cell]
+        return int(root)
+
+    def union(self, first, second):
+        """Merge the clusters containing the given cells. """
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return
+        if self.size[first] < self.size[second]:
+            first, second = second, first
+        self.parent[second] = first
+        self.size[first] += self.size[second]
+
+    def cluster_size(self, cell):
+        """Get the number of trees in the cluster containing a cell. """
+        return int(self.size[self.find(cell)])
+
+    def add_trees(self, cells, forest):
+        """
+        Join newly grown trees to the clusters of their neighbours.
+
+        Args:
+            cells(np.ndarray): Flat indices of the new trees.
+            forest(np.ndarray): The forest already containing the new trees.
+
+        Returns:
+            None.
+
+        """
+        flat_forest = forest.reshape(-1)
+        neighbours, inside = neighbour_indices(cells, self.shape)
+        joins = inside & (flat_forest[neighbours] == cell_state.TREE)
+        new_trees, sides = np.nonzero(joins)
+        for cell, neighbour in zip(cells[new_trees].tolist(),
+                                   neighbours[new_trees, sides].tolist()):
+            self.union(cell, neighbour)
+
+    def burn(self, cell, forest):
+        """
+        Burn the whole cluster containing a tree, turning it to soil.
+
+        Args:
+            cell(int): The flat index of the tree hit by lightning.
+            forest(np.ndarray): The forest.
+
+        Returns:
+            np.ndarray: The flat indices of the burnt trees.
+
+        """
+        flat_forest = forest.reshape(-1)
+        # breadth first search over the cluster, one ring of cells at a time
+        front = np.array([cell], dtype=np.int64)
+        flat_forest[front] = cell_state.SOIL
+        burnt = [front]
+        while front.size:
+            neighbours, inside = neighbour_indices(front, self.shape)
+            neighbours = np.unique(neighbours[inside])
+            front = neighbours[flat_forest[neighbours] == cell_state.TREE]
+            flat_forest[front] = cell_state.SOIL
+            burnt.append(front)
+        burnt = np.concatenate(burnt)
+        self.parent[burnt] = burnt
+        self.size[burnt] = 1
+        return burnt
@@ -8,6 +8,7 @@ from simulations.engine import SimulationEngine
 
 from forestfire.plothelpers import add_subplots, add_artists, update_artists, update_axes, clear
 from forestfire.guibuilders import add_controls, add_sliders
+from forestfire.viewer import ForestViewer
 
 from forestfire.model import ForestFireModel
 
@@ -20,6 +21,7 @@ class ForestFireEngine(SimulationEngine):
         super().__init__("Forest Fire Model")
         self.axes = add_subplots(self.figure)
         self.lines, self.bars = add_artists(self.axes)
+        self.viewer = ForestViewer(self.axes["forest"])
         self.model = ForestFireModel()
 
         add_sliders(self, self.controlPanel)
@@ -31,6 +33,7 @@ class ForestFireEngine(SimulationEngine):
     def clear_figure(self):
         """Clear all lines and bars from the figure but keep labels intact. """
         clear(self.lines, self.bars)
+        self.viewer.reset()
 
     def start_simulation(self):
         """Start the simulation. """
@@ -44,6 +47,7 @@ class ForestFireEngine(SimulationEngine):
         self.running = False
         self.clear_figure()
         self.model.clear()
+        self.reset_frame_pacing()
         self.running = True
         self.simulate()
 
@@ -51,15 +55,6 @@ class ForestFireEngine(SimulationEngine):
         """Stop the simulation. """
         self.running = False
 
-    def simulate(self):
-        """Advance the simulation. """
-        if self.running:
-            self.model.update()
-            self.timeText.set(f"t = {self.model.time}")
-            if not self.silent:
-                self.visualise()
-            self.after(1, self.simulate)
-
     def set_silent(self):
         """Toggles the visualisation of the simulation. """
         self.silent = not self.silent
@@ -68,6 +63,20 @@ class ForestFireEngine(SimulationEngine):
     def change_size(self, size):
         """Change the size of the simulation. """
         self.model.set_size(size)
+        self.reset_frame_pacing()
+
+    def set_updatemode(self, updatemode):
+        """
+        Change the algorithm used for the update.
+
+        Args:
+            updatemode(int): Specify which algorithm to use.
+                1 - fire spreads to neighbouring trees in each update
+                2 - lightning burns the whole cluster instantly
+
+        """
+        self.model.set_updatemode(updatemode)
+        self.reset_frame_pacing()
 
     def set_lightning_probability(self, lightning_probability):
         self.model.set_lightning_probability(int(lightning_probability) / 100_000)
@@ -87,5 +96,6 @@ class ForestFireEngine(SimulationEngine):
         """Visualise the data generated by the model. """
         data = self.model.get_data()
         update_artists((self.lines, self.bars), data)
-        # update_axes(self.axes, data)
+        self.viewer.render(data["forest"])
+        update_axes(self.axes, data)
         self.canvas.draw()
@@ -0,0 +1,198 @@
+"""
+Contains an ensemble of independent forest fire models stacked into one
+array of shape (replicas, size, size). All replicas are advanced by a single
+vectorised update, so small lattices share the cost of the interpreter
+instead of running one process per forest.
+"""
+import numpy as np
+
+from forestfire import cell_state
+from forestfire.model import (DEFAULT_LIGHTNING_PROBABILITY, DEFAULT_SIZE,
+                              DEFAULT_TREE_GROWTH, STATE_DTYPE)
+from forestfire.kernels import SCRATCH_MASKS
+
+DEFAULT_REPLICAS = 16
+
+
+def update_replicas(source, target, draws, tree_growth, lightning_probability,
+                    scratch):
+    """
+    Apply the forest fire rules of update_rows to a stack of forests without
+    allocating memory. Cells outside of a forest count as not burning.
+
+    Args:
+        source(np.ndarray): The forests before the update, the first axis
+            numbers the replicas.
+        target(np.ndarray): The array to write the updated forests to.
+        draws(np.ndarray): One uniform random number per cell.
+        tree_growth(float): The probability for a tree to grow on soil.
+        lightning_probability(float): The probability for lightning to
+            strike a tree.
+        scratch(dict): Boolean arrays of the shape of the forests, one for
+            each name in SCRATCH_MASKS.
+
+    Returns:
+        tuple: The number of trees ignited by a burning neighbour and the
+            number of trees hit by lightning in each replica.
+
+    """
+    near_fire, tree, mask, other = (scratch[name] for name in SCRATCH_MASKS)
+    np.equal(source, cell_state.FIRE, out=tree)
+
+    # burning nearest neighbours from shifted views of the forests
+    near_fire[:] = False
+    np.logical_or(near_fire[:, 1:], tree[:, :-1], out=near_fire[:, 1:])
+    np.logical_or(near_fire[:, :-1], tree[:, 1:], out=near_fire[:, :-1])
+    np.logical_or(near_fire[..., 1:], tree[..., :-1], out=near_fire[..., 1:])
+    np.logical_or(near_fire[..., :-1], tree[..., 1:], out=near_fire[..., :-1])
+
+    np.equal(source, cell_state.TREE, out=tree)
+    catches_fire = np.logical_and(near_fire, tree, out=near_fire)
+    np.less(draws, lightning_probability, out=mask)
+    np.logical_and(mask, tree, out=mask)
+    struck = np.logical_and(mask, np.logical_not(catches_fire, out=other),
+                            out=mask)
+    spread = np.count_nonzero(catches_fire, axis=(1, 2))
+    strikes = np.count_nonzero(struck, axis=(1, 2))
+
+    target[:] = source
+    np.equal(source, cell_state.FIRE, out=tree)
+    np.copyto(target, cell_state.SOIL, where=tree)
+    np.equal(source, cell_state.SOIL, out=tree)
+    np.less(draws, tree_growth, out=other)
+    np.copyto(target, cell_state.TREE,
+              where=np.logical_and(tree, other, out=tree))
+    np.copyto(target, cell_state.FIRE,
+              where=np.logical_or(catches_fire, struck, out=tree))
+    return spread, strikes
+
+
+class ForestFireEnsemble:
+    """Independent forest fire models updated together"""
+
+    def __init__(self, replicas=None, size=None, lightning_probability=None,
+                 tree_growth=None):
+        """
+        Initialise the ensemble. Fire spreads by one cell per update as in
+        updatemode 1 of ForestFireModel.
+
+        Args:
+            replicas(int or None): The number of forests. Defaults to None
+                meaning DEFAULT_REPLICAS.
+            size(int or None): The number of cells per side of each forest.
+            lightning_probability(float or None): The probability for
+                lightning to strike a tree.
+            tree_growth(float or None): The probability for a tree to grow on
+                soil.
+
+        """
+        self.replicas = replicas if replicas is not None else DEFAULT_REPLICAS
+        self.size = size if size is not None else DEFAULT_SIZE
+        self.lightning_probability = lightning_probability if lightning_probability is not None \
+                                     else DEFAULT_LIGHTNING_PROBABILITY
+        self.tree_growth = tree_growth if tree_growth is not None \
+                           else DEFAULT_TREE_GROWTH
+
+        self.set_up_simulation()
+
+    def clear(self):
+        """Restart the simulation"""
+        self.set_up_simulation()
+
+    def set_up_simulation(self):
+        """Initialise all values needed for the simulation"""
+        shape = (self.replicas, self.size, self.size)
+        self.forest = np.zeros(shape, dtype=STATE_DTYPE)
+        self.next_forest = np.empty_like(self.forest)
+        self.scratch = {name: np.empty(shape, dtype=bool)
+                        for name in SCRATCH_MASKS}
+        self.draws = np.empty(shape, dtype=np.float32)
+        self.rng = np.random.default_rng(np.random.randint(2 ** 31))
+        self.time = 0
+
+        # completed avalanches of every replica
+        self.avalanche_sizes = [[] for _ in range(self.replicas)]
+        self.avalanche_durations = [[] for _ in range(self.replicas)]
+        # the avalanche burning in every replica
+        self.is_in_avalanche = np.zeros(self.replicas, dtype=bool)
+        self.current_sizes = np.zeros(self.replicas, dtype=np.int64)
+        self.current_durations = np.zeros(self.replicas, dtype=np.int64)
+
+    def update(self):
+        """Update all forests by one step."""
+        self.rng.random(dtype=np.float32, out=self.draws)
+        spread, strikes = update_replicas(
+            self.forest, self.next_forest, self.draws, self.tree_growth,
+            self.lightning_probability, self.scratch
+        )
+        self.forest, self.next_forest = self.next_forest, self.forest
+        self.record_avalanches(spread, strikes)
+        self.time += 1
+
+    def record_avalanches(self, spread, strikes):
+        """
+        Add the trees that caught fire during one update to the avalanche
+        statistics of every replica, following the convention of
+        ForestFireModel.record_avalanches. Only replicas in which an
+        avalanche starts or ends are visited one by one.
+
+        Args:
+            spread(np.ndarray): The number of trees ignited by a burning
+                neighbour in each replica.
+            strikes(np.ndarray): The number of trees hit by lightning in each
+                replica.
+
+        """
+        ignited = spread + strikes
+        burning = ignited > 0
+        continued = self.is_in_avalanche
+        self.current_sizes[continued] += ignited[continued]
+
+        for replica in np.flatnonzero(continued & ~burning).tolist():
+            self.avalanche_sizes[replica].append(int(self.current_sizes[replica]))
+            self.avalanche_durations[replica].append(
+                int(self.current_durations[replica])
+            )
+
+        started = ~continued & (strikes > 0)
+        for replica in np.flatnonzero(started).tolist():
+            # all but the last strike start avalanches which end at once
+            self.avalanche_sizes[replica].extend([0] * (strikes[replica] - 1))
+            self.avalanche_durations[replica].extend([0] * (strikes[replica] - 1))
+        self.current_sizes[started] = 0
+        self.current_durations[started] = 0
+
+        self.is_in_avalanche = burning
+        self.current_durations[burning] += 1
+
+    def set_tree_growth(self, tree_growth): self.tree_growth = tree_growth
+
+    def set_lightning_probability(self, lightning_probability): self.lightning_probability = lightning_probability
+
+    def get_data(self):
+        """
+        Get the measured data and meta data of every replica in the form of
+        ForestFireModel.get_data. An avalanche which is still burning is the
+        last entry of the lists.
+
+        Returns:
+            list: One dict per replica.
+
+        """
+        data = []
+        for replica in range(self.replicas):
+            sizes = list(self.avalanche_sizes[replica])
+            durations = list(self.avalanche_durations[replica])
+            if self.is_in_avalanche[replica]:
+                sizes.append(int(self.current_sizes[replica]))
+                durations.append(int(self.current_durations[replica]))
+            data.append({
+                "time": self.time,
+                "system size": self.size,
+                "forest": self.forest[replica],
+                "avalanche sizes": sizes,
+                "avalanche durations": durations,
+                "tree growth": self.tree_growth,
+                "lightning": self.lightning_probability
+            })
+        return data
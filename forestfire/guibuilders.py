@@ -23,9 +23,15 @@ def add_sliders(root, frame):
     tk.Label(frame, text="Size: ", font="Verdana 11").grid(
         row=1, column=0, sticky=tk.W
     )
-    tk.Scale(frame, from_=8, to=128, length=200, orient=tk.HORIZONTAL,
+    tk.Scale(frame, from_=8, to=4096, length=200, orient=tk.HORIZONTAL,
              command=root.change_size).grid(row=1, column=1)
 
+    tk.Label(frame, text="Fire mode: ", font="Verdana 11").grid(
+        row=2,column=0, sticky=tk.W
+    )
+    tk.Scale(frame, from_=1, to=2, length=200, orient=tk.HORIZONTAL,
+             command=root.set_updatemode).grid(row=2, column=1)
+
     tk.Label(frame, text="Lightning probability: ", font="Verdana 11").grid(
         row=3,column=0, sticky=tk.W
     )
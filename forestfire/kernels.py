@@ -0,0 +1,96 @@
+"""
+Contains the vectorised update of the forest fire model for bands of rows.
+"""
+import numpy as np
+
+from forestfire import cell_state
+
+# number of rows updated at once, bounding the size of the scratch arrays
+BAND_ROWS = 256
+SCRATCH_MASKS = ("near fire", "tree", "mask", "other")
+
+
+def allocate_scratch(rows, cols):
+    """
+    Allocate the temporary arrays used by update_rows.
+
+    Args:
+        rows(int): The maximum number of rows updated at once.
+        cols(int): The number of columns of the forest.
+
+    Returns:
+        dict: The scratch arrays.
+
+    """
+    scratch = {name: np.empty((rows, cols), dtype=bool)
+               for name in SCRATCH_MASKS}
+    scratch["draws"] = np.empty((rows, cols), dtype=np.float32)
+    return scratch
+
+
+def update_rows(source, target, first, last, draws, tree_growth,
+                lightning_probability, scratch):
+    """
+    Apply the forest fire rules to the rows [first, last) of a forest without
+    allocating memory. Burning cells turn to soil, trees next to a fire or
+    hit by lightning catch fire and trees grow on soil. Cells outside of the
+    forest count as not burning.
+
+    Args:
+        source(np.ndarray): The forest before the update.
+        target(np.ndarray): The forest to write the updated rows to.
+        first(int): The first row to update.
+        last(int): The row after the last row to update.
+        draws(np.ndarray): One uniform random number per updated cell, which
+            decides about lightning for trees and growth for soil.
+        tree_growth(float): The probability for a tree to grow on soil.
+        lightning_probability(float): The probability for lightning to
+            strike a tree.
+        scratch(dict): Temporary arrays as returned by allocate_scratch.
+
+    Returns:
+        tuple: The number of trees ignited by a burning neighbour, the
+            number of trees hit by lightning and the number of grown trees.
+
+    """
+    nrows, nforest_rows = last - first, source.shape[0]
+    near_fire, tree, mask, other = (scratch[name][:nrows]
+                                    for name in SCRATCH_MASKS)
+    rows, new_rows = source[first:last], target[first:last]
+
+    # burning nearest neighbours from shifted views of the forest
+    near_fire[:] = False
+    np.equal(rows[:, :-1], cell_state.FIRE, out=mask[:, 1:])
+    np.logical_or(near_fire[:, 1:], mask[:, 1:], out=near_fire[:, 1:])
+    np.equal(rows[:, 1:], cell_state.FIRE, out=mask[:, :-1])
+    np.logical_or(near_fire[:, :-1], mask[:, :-1], out=near_fire[:, :-1])
+    upper = max(first - 1, 0)
+    np.equal(source[upper:last - 1], cell_state.FIRE,
+             out=mask[upper - first + 1:])
+    np.logical_or(near_fire[upper - first + 1:], mask[upper - first + 1:],
+                  out=near_fire[upper - first + 1:])
+    lower = min(last + 1, nforest_rows)
+    np.equal(source[first + 1:lower], cell_state.FIRE,
+             out=mask[:lower - first - 1])
+    np.logical_or(near_fire[:lower - first - 1], mask[:lower - first - 1],
+                  out=near_fire[:lower - first - 1])
+
+    np.equal(rows, cell_state.TREE, out=tree)
+    catches_fire = np.logical_and(near_fire, tree, out=near_fire)
+    np.less(draws, lightning_probability, out=mask)
+    np.logical_and(mask, tree, out=mask)
+    struck = np.logical_and(mask, np.logical_not(catches_fire, out=other),
+                            out=mask)
+    spread, strikes = np.count_nonzero(catches_fire), np.count_nonzero(struck)
+
+    new_rows[:] = rows
+    np.equal(rows, cell_state.FIRE, out=tree)
+    np.copyto(new_rows, cell_state.SOIL, where=tree)
+    np.equal(rows, cell_state.SOIL, out=tree)
+    np.less(draws, tree_growth, out=other)
+    grown = np.logical_and(tree, other, out=tree)
+    np.copyto(new_rows, cell_state.TREE, where=grown)
+    grown = np.count_nonzero(grown)
+    np.copyto(new_rows, cell_state.FIRE,
+              where=np.logical_or(catches_fire, struck, out=tree))
+    return int(spread), int(strikes), int(grown)
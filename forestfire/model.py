@@ -3,26 +3,59 @@ Contains a class for simulating the Forest Fire model.
 """
 import numpy as np
 
-from random import random, randint
-
 from forestfire import cell_state
+from forestfire.clusters import FireTracker, StateIndex, TreeClusters
+from forestfire.kernels import BAND_ROWS, allocate_scratch, update_rows
+from forestfire.parallel import BandPool
+from forestfire.series import CountSeries
+from forestfire.sparse import ActiveFront
+from forestfire.tiles import TilePool
 
 DEFAULT_SIZE = 8
 DEFAULT_LIGHTNING_PROBABILITY = 1e-5
 DEFAULT_TREE_GROWTH = 7e-4
+# one byte per cell holds the three states
+STATE_DTYPE = np.int8
+# implementations of the update with spreading fire
+BACKENDS = ("dense", "sparse", "threads", "processes")
 
 
 class ForestFireModel:
     """The forest fire model"""
 
     def __init__(self, size=None, lightning_probability=None,
-                 tree_growth=None):
-        """Initialise the model"""
+                 tree_growth=None, track_fires=False, updatemode=None,
+                 backend=None, workers=None):
+        """
+        Initialise the model
+
+        Args:
+            size(int or None): The number of cells per side of the forest.
+            lightning_probability(float or None): The probability for
+                lightning to strike a tree.
+            tree_growth(float or None): The probability for a tree to grow on
+                soil.
+            track_fires(bool): Whether to measure the size and duration of
+                every independent fire, see forestfire.clusters.
+            updatemode(int or None): Specify which algorithm to use, see
+                set_updatemode. Defaults to None meaning 1.
+            backend(str or None): The implementation of updatemode 1, see
+                set_backend. Defaults to None meaning 'dense'.
+            workers(int or None): The number of threads or processes of the
+                parallel backends. Defaults to None meaning one per cpu.
+
+        """
         self.size = size if size is not None else DEFAULT_SIZE
         self.lightning_probability = lightning_probability if lightning_probability is not None \
                                      else DEFAULT_LIGHTNING_PROBABILITY
         self.tree_growth = tree_growth if tree_growth is not None \
                            else DEFAULT_TREE_GROWTH
+        self.track_fires = track_fires
+        self.updatemode = updatemode if updatemode is not None else 1
+        self.workers = workers
+        self.band_pool = None
+        self.tile_pool = None
+        self.set_backend(backend if backend is not None else "dense")
 
         self.set_up_simulation()
 
@@ -32,53 +65,275 @@ class ForestFireModel:
 
     def set_up_simulation(self):
         """Initialise all values needed for the simulation"""
-        self.forest = np.zeros((self.size, self.size))
+        self.release_workers()
+        self.allocate_forest()
+        # derived from the global state so that np.random.seed keeps runs
+        # reproducible
+        self.rng = np.random.default_rng(np.random.randint(2 ** 31))
         self.time = 0
         self.avalanche_sizes = []
         self.avalanche_durations = []
+        self.is_in_avalanche = False
+        self.count_cells()
+        self.series = CountSeries()
+        self.series.append(self.time, self.tree_count, self.fire_count,
+                           self.soil_count)
+        self.fire_tracker = FireTracker(self.forest.shape) if self.track_fires \
+                            else None
+        # built on demand for updatemode 2 and the sparse backend
+        self.tree_clusters = None
+        self.soil_index = self.tree_index = None
+        self.active_front = None
+
+    def allocate_forest(self, forest=None):
+        """
+        Allocate the two buffers holding the forest and the scratch arrays
+        for the update.
+
+        Args:
+            forest(np.ndarray or None): The initial forest. Defaults to None
+                meaning the forest is filled with soil.
+
+        """
+        self.forest = np.zeros((self.size, self.size), dtype=STATE_DTYPE)
+        if forest is not None:
+            self.forest[:] = forest
+        self.next_forest = np.empty_like(self.forest)
+        self.scratch = allocate_scratch(min(BAND_ROWS, self.size), self.size)
+
+    def count_cells(self):
+        """
+        Count the trees, fires and soil cells of the whole forest. The
+        updates keep these counts up to date from the cells they change, so
+        this is only needed after the forest was changed from outside.
+        """
+        self.tree_count = int(np.count_nonzero(cell_state.is_tree(self.forest)))
+        self.fire_count = int(np.count_nonzero(cell_state.is_burning(self.forest)))
+        self.soil_count = self.forest.size - self.tree_count - self.fire_count
 
     def update(self):
         """The update algorithm for the Forest Fire model."""
-        new_states = np.zeros((self.size, self.size))
+        if self.updatemode == 2:
+            self.update_instant()
+        else:
+            self.update_spreading()
+        self.series.append(self.time, self.tree_count, self.fire_count,
+                           self.soil_count)
 
-        for col in range(self.size):
-            for row in range(self.size):
-                cell = self.forest[row, col]
+    def update_spreading(self):
+        """Update with fire spreading by one cell per update."""
+        if self.backend == "sparse":
+            if self.active_front is None:
+                self.active_front = ActiveFront(self.forest)
+            spread, strikes, grown = self.active_front.update(
+                self.forest, self.rng, self.tree_growth,
+                self.lightning_probability
+            )
+            burning = self.active_front.burning
+        elif self.backend == "threads":
+            if self.band_pool is None:
+                self.band_pool = BandPool(self.forest.shape, self.rng,
+                                          self.workers)
+            spread, strikes, grown = self.band_pool.update(
+                self.forest, self.next_forest, self.tree_growth,
+                self.lightning_probability
+            )
+            self.forest, self.next_forest = self.next_forest, self.forest
+            burning = None
+        elif self.backend == "processes":
+            if self.tile_pool is None:
+                self.tile_pool = TilePool(self.forest, self.rng, self.workers)
+            spread, strikes, grown = self.tile_pool.update(
+                self.tree_growth, self.lightning_probability
+            )
+            self.forest = self.tile_pool.forest
+            self.next_forest = self.tile_pool.buffers[1 - self.tile_pool.current]
+            burning = None
+        else:
+            spread, strikes, grown = self.update_dense()
+            burning = None
 
-                if cell_state.is_burning(cell):
-                    new_states[row, col] = cell_state.SOIL
-                elif cell_state.is_tree(cell):
-                    new_states[row, col] = cell_state.TREE
-                    self.update_tree(new_states, row, col)
-                elif cell_state.is_soil(cell) and random() < self.tree_growth:
-                    new_states[row, col] = cell_state.TREE
+        # burning trees turn to soil, the ignited ones are the new fires
+        self.soil_count += self.fire_count - grown
+        self.tree_count += grown - spread - strikes
+        self.fire_count = spread + strikes
+        self.record_avalanches(spread, strikes)
+        self.time += 1
+        if self.fire_tracker is not None:
+            if burning is None:
+                burning = np.flatnonzero(cell_state.is_burning(self.forest))
+            self.fire_tracker.update(burning, self.time)
 
-        self.forest = new_states
+    def update_dense(self):
+        """
+        Update all cells at once from the previous state, band by band, into
+        the second buffer which then becomes the current forest.
 
-        self.is_in_avalanche = np.any(np.where(self.forest == cell_state.FIRE))
-        if self.is_in_avalanche:
-            self.avalanche_durations[-1] += 1
+        Returns:
+            tuple: The number of trees ignited by a burning neighbour, the
+                number of trees hit by lightning and the number of grown
+                trees.
+
+        """
+        spread = strikes = grown = 0
+        for first in range(0, self.size, BAND_ROWS):
+            last = min(first + BAND_ROWS, self.size)
+            draws = self.scratch["draws"][:last - first]
+            self.rng.random(dtype=np.float32, out=draws)
+            band_spread, band_strikes, band_grown = update_rows(
+                self.forest, self.next_forest, first, last, draws,
+                self.tree_growth, self.lightning_probability, self.scratch
+            )
+            spread += band_spread
+            strikes += band_strikes
+            grown += band_grown
+        self.forest, self.next_forest = self.next_forest, self.forest
+        return spread, strikes, grown
+
+    def update_instant(self):
+        """
+        Update in the limit of separated time scales (Drossel-Schwabl): fires
+        burn out within a single update. Each soil cell grows a tree with the
+        probability tree_growth, then each tree is hit by lightning with the
+        probability lightning_probability and its whole cluster burns down.
+        The number of changing cells is drawn from a binomial distribution
+        and only those cells are visited, so an update costs about the
+        number of new trees plus the size of the burnt clusters.
+        """
+        if self.tree_clusters is None:
+            self.forest[cell_state.is_burning(self.forest)] = cell_state.SOIL
+            self.soil_count += self.fire_count
+            self.fire_count = 0
+            self.tree_clusters = TreeClusters(self.forest)
+            self.soil_index = StateIndex(cell_state.SOIL)
+            self.tree_index = StateIndex(cell_state.TREE)
+
+        cells = self.forest.reshape(-1)
+        new_trees = self.soil_index.sample(
+            self.rng, cells, self.rng.binomial(self.soil_count, self.tree_growth),
+            self.soil_count
+        )
+        cells[new_trees] = cell_state.TREE
+        self.tree_clusters.add_trees(new_trees, self.forest)
+        self.soil_index.update(removed=new_trees)
+        self.tree_index.update(added=new_trees)
+        self.tree_count += new_trees.size
+        self.soil_count -= new_trees.size
+
+        struck = self.tree_index.sample(
+            self.rng, cells,
+            self.rng.binomial(self.tree_count, self.lightning_probability),
+            self.tree_count
+        )
+        burnt = []
+        for cell in struck.tolist():
+            # a cluster hit twice in one update only burns once
+            if not cell_state.is_tree(cells[cell]):
+                continue
+            cluster = self.tree_clusters.burn(cell, self.forest)
+            burnt.append(cluster)
+            size = cluster.size
+            self.tree_count -= size
+            self.soil_count += size
+            # same convention as record_avalanches: the struck tree is not
+            # counted in the size of the avalanche
+            self.avalanche_sizes.append(size - 1)
+            self.avalanche_durations.append(1)
+            if self.fire_tracker is not None:
+                self.fire_tracker.fire_sizes.append(size)
+                self.fire_tracker.fire_durations.append(1)
+        if burnt:
+            burnt = np.concatenate(burnt)
+            self.tree_index.update(removed=burnt)
+            self.soil_index.update(added=burnt)
 
         self.time += 1
 
+    def record_avalanches(self, spread, strikes):
+        """
+        Add the trees that caught fire during one update to the avalanche
+        statistics. A lightning strike while no fire is burning starts a new
+        avalanche of size zero, every other tree catching fire increases the
+        size of the current avalanche.
+
+        Args:
+            spread(int): The number of trees ignited by a burning neighbour.
+            strikes(int): The number of trees hit by lightning.
 
-    def update_tree(self, new_states, row, col):
-        """Update algorithm for a tree cell"""
-        if cell_state.neighbours_are_burning(self.forest, row, col):
-            new_states[row, col] = cell_state.FIRE
-            self.avalanche_sizes[-1] += 1
-        elif random() < self.lightning_probability:
-            new_states[row, col] = cell_state.FIRE
-            if self.is_in_avalanche:
-                self.avalanche_sizes[-1] += 1
-            else:
-                self.avalanche_sizes.append(0)
-                self.avalanche_durations.append(0)
+        """
+        if self.is_in_avalanche:
+            self.avalanche_sizes[-1] += spread + strikes
+        else:
+            self.avalanche_sizes.extend([0] * strikes)
+            self.avalanche_durations.extend([0] * strikes)
+
+        self.is_in_avalanche = spread + strikes > 0
+        if self.is_in_avalanche:
+            self.avalanche_durations[-1] += 1
 
     def set_tree_growth(self, tree_growth): self.tree_growth = tree_growth
 
     def set_lightning_probability(self, lightning_probability): self.lightning_probability = lightning_probability
 
+    def set_updatemode(self, updatemode):
+        """
+        Change the algorithm used for the update.
+
+        Args:
+            updatemode(int): Specify which algorithm to use.
+                1 - fire spreads to neighbouring trees in each update
+                2 - lightning burns the whole cluster instantly
+        """
+        self.updatemode = int(updatemode)
+        self.tree_clusters = None
+        self.active_front = None
+        # a fire still burning continues its avalanche with spreading fire,
+        # the instant update puts it out before it starts
+        self.is_in_avalanche = self.updatemode != 2 and self.fire_count > 0
+        if self.is_in_avalanche and not self.avalanche_sizes:
+            # the start of the fire was not recorded, e.g. it was set from
+            # outside
+            self.avalanche_sizes.append(0)
+            self.avalanche_durations.append(0)
+
+    def set_backend(self, backend):
+        """
+        Change the implementation of the update with spreading fire. Both
+        follow the same rules.
+
+        Args:
+            backend(str): Specify which implementation to use.
+                'dense' - update every cell in vectorised bands
+                'sparse' - only visit burning cells, their neighbours and the
+                    cells picked for growth and lightning, see
+                    forestfire.sparse
+                'threads' - update bands of rows on several cores, see
+                    forestfire.parallel
+                'processes' - update tiles of the forest in shared memory
+                    with several processes, see forestfire.tiles
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of "
+                             f"{', '.join(BACKENDS)}")
+        self.backend = backend
+        self.active_front = None
+        self.release_workers()
+
+    def release_workers(self):
+        """
+        Stop the threads or processes of the parallel backends if they are
+        running. They are started again by the next update.
+        """
+        if self.band_pool is not None:
+            self.band_pool.close()
+            self.band_pool = None
+        if self.tile_pool is not None:
+            tile_pool, self.tile_pool = self.tile_pool, None
+            # drop the views of the shared memory before it is freed
+            self.forest = self.next_forest = None
+            self.forest = tile_pool.close()
+            self.next_forest = np.empty_like(self.forest)
+
     def set_size(self, size):
         """
         Expand or trunctuate the tree array.
@@ -87,22 +342,94 @@ class ForestFireModel:
             size(int): The new size of the array.
 
         """
+        self.release_workers()
+        old_forest = self.forest
+        kept = min(int(size), old_forest.shape[0])
         self.size = int(size)
-        if self.size > self.forest.shape[0]:
-            new = np.zeros((self.size, self.size))
-            new[:self.forest.shape[0], :self.forest.shape[1]] = self.forest
-            self.forest = new
-        elif self.size < self.forest.shape[0]:
-            self.forest = self.forest[:self.size, :self.size]
+        self.allocate_forest()
+        self.forest[:kept, :kept] = old_forest[:kept, :kept]
+        self.count_cells()
+        self.tree_clusters = None
+        self.active_front = None
+        if self.fire_tracker is not None:
+            # fires cannot be followed across a change of the lattice
+            self.fire_tracker = FireTracker(self.forest.shape)
 
-    def get_data(self):
-        """Get the measured data and meta data. """
+    def get_state(self):
+        """
+        Get everything needed to continue the simulation later.
+
+        Returns:
+            dict: The forest, the parameters, the time, the state of the
+                random number generator and the avalanches kept in memory.
+
+        """
         return {
+            "forest": self.forest.copy(),
+            "time": self.time,
+            "tree growth": self.tree_growth,
+            "lightning": self.lightning_probability,
+            "updatemode": self.updatemode,
+            "rng": self.rng.bit_generator.state,
+            "is in avalanche": self.is_in_avalanche,
+            "avalanche sizes": np.array(self.avalanche_sizes, dtype=np.int64),
+            "avalanche durations": np.array(self.avalanche_durations,
+                                            dtype=np.int64)
+        }
+
+    def set_state(self, state):
+        """
+        Continue a simulation from a state returned by get_state. The
+        parallel backends draw new seeds for their workers.
+
+        Args:
+            state(dict): The state of the simulation.
+
+        """
+        self.release_workers()
+        self.size = state["forest"].shape[0]
+        self.allocate_forest(state["forest"])
+        self.time = int(state["time"])
+        self.tree_growth = float(state["tree growth"])
+        self.lightning_probability = float(state["lightning"])
+        self.count_cells()
+        self.set_updatemode(state["updatemode"])
+        self.rng.bit_generator.state = state["rng"]
+        self.is_in_avalanche = bool(state["is in avalanche"])
+        self.avalanche_sizes = [int(size) for size in state["avalanche sizes"]]
+        self.avalanche_durations = [int(duration) for duration
+                                    in state["avalanche durations"]]
+        self.series = CountSeries()
+        self.series.append(self.time, self.tree_count, self.fire_count,
+                           self.soil_count)
+        if self.fire_tracker is not None:
+            self.fire_tracker = FireTracker(self.forest.shape)
+
+    def get_data(self):
+        """
+        Get the measured data and meta data. The arrays are copies, so
+        changing them does not change the model.
+        """
+        data = {
             "time": self.time,
             "system size": self.size,
-            "forest": self.forest,
-            "avalanche sizes": self.avalanche_sizes,
-            "avalanche durations": self.avalanche_durations,
+            "forest": self.forest.copy(),
+            "avalanche sizes": np.array(self.avalanche_sizes, dtype=np.int64),
+            "avalanche durations": np.array(self.avalanche_durations,
+                                            dtype=np.int64),
             "tree growth": self.tree_growth,
-            "lightning": self.lightning_probability
+            "lightning": self.lightning_probability,
+            "tree count": self.tree_count,
+            "fire count": self.fire_count,
+            "soil count": self.soil_count
         }
+        # the counts after each of the most recent updates
+        for name, values in self.series.get().items():
+            data[f"{name} series"] = values.copy()
+        if self.fire_tracker is not None:
+            # the number of burnt trees and of updates of every complete fire
+            data["fire sizes"] = np.array(self.fire_tracker.fire_sizes,
+                                          dtype=np.int64)
+            data["fire durations"] = np.array(self.fire_tracker.fire_durations,
+                                              dtype=np.int64)
+        return data
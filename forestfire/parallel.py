@@ -0,0 +1,178 @@
+"""
+Contains a multicore update of the forest fire model. The forest is split into
+one band of rows per thread and every thread applies the vectorised kernel of
+forestfire.kernels to its band. NumPy releases the GIL inside the kernel, so
+the bands are updated in parallel.
+
+The GPU sketch in gpu_forest_fire.py needs a black/white checkerboard because
+it updates cells in place. Here every update reads the previous forest and
+writes a second buffer, so neighbouring bands never race and contiguous bands
+are enough.
+
+Run this module to compare the parallel update with the serial kernel and to
+measure how it scales with the number of threads:
+
+    python -m forestfire.parallel
+"""
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+import numpy as np
+
+from forestfire.kernels import BAND_ROWS, allocate_scratch, update_rows
+
+
+class BandPool:
+    """Updates a forest with a pool of threads, one band of rows each"""
+
+    def __init__(self, shape, rng, workers=None):
+        """
+        Initialise the pool.
+
+        Args:
+            shape(tuple): The shape of the forest.
+            rng(np.random.Generator): Seeds an independent random number
+                generator for every band.
+            workers(int or None): The number of threads. Defaults to None
+                meaning one thread per cpu.
+
+        """
+        self.workers = workers if workers is not None else os.cpu_count()
+        nrows, ncols = shape
+        edges = np.linspace(0, nrows, min(self.workers, nrows) + 1).astype(int)
+        self.bands = list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+        seeds = np.random.SeedSequence(int(rng.integers(2 ** 63))).spawn(
+            len(self.bands)
+        )
+        self.generators = [np.random.default_rng(seed) for seed in seeds]
+        self.scratch = [allocate_scratch(min(BAND_ROWS, last - first), ncols)
+                        for first, last in self.bands]
+        self.executor = ThreadPoolExecutor(max_workers=len(self.bands))
+
+    def _update_band(self, band, source, target, tree_growth,
+                     lightning_probability):
+        """Update one band in chunks of BAND_ROWS rows"""
+        first, last = self.bands[band]
+        rng, scratch = self.generators[band], self.scratch[band]
+        counts = np.zeros(3, dtype=np.int64)
+        for start in range(first, last, BAND_ROWS):
+            stop = min(start + BAND_ROWS, last)
+            draws = scratch["draws"][:stop - start]
+            rng.random(dtype=np.float32, out=draws)
+            counts += update_rows(source, target, start, stop, draws,
+                                  tree_growth, lightning_probability, scratch)
+        return counts
+
+    def update(self, source, target, tree_growth, lightning_probability):
+        """
+        Write the updated forest into the target array.
+
+        Args:
+            source(np.ndarray): The forest before the update.
+            target(np.ndarray): The array to write the updated forest to.
+            tree_growth(float): The probability for a tree to grow on soil.
+            lightning_probability(float): The probability for lightning to
+                strike a tree.
+
+        Returns:
+            tuple: The number of trees ignited by a burning neighbour, the
+                number of trees hit by lightning and the number of grown
+                trees.
+
+        """
+        futures = [
+            self.executor.submit(self._update_band, band, source, target,
+                                 tree_growth, lightning_probability)
+            for band in range(len(self.bands))
+        ]
+        counts = sum(future.result() for future in futures)
+        return tuple(int(count) for count in counts)
+
+    def close(self):
+        """Stop the threads of the pool. """
+        self.executor.shutdown()
+
+
+def verify_against_serial(size=200, nupdates=100, workers=4, seed=0):
+    """
+    Check that the parallel update gives the same forest as the serial kernel
+    fed with the same random numbers.
+
+    Args:
+        size(int): The number of cells per side of the forest.
+        nupdates(int): The number of updates to compare.
+        workers(int): The number of threads.
+        seed(int): The seed of the random number generator.
+
+    Returns:
+        bool: True if all forests and counts agreed.
+
+    """
+    rng = np.random.default_rng(seed)
+    forest = rng.choice(np.array([-1, 0, 1], dtype=np.int8), size=(size, size),
+                        p=[0.01, 0.5, 0.49])
+    parallel = (forest.copy(), np.empty_like(forest))
+    serial = (forest.copy(), np.empty_like(forest))
+    pool = BandPool(forest.shape, rng, workers)
+    scratch = allocate_scratch(min(BAND_ROWS, size), size)
+
+    for _ in range(nupdates):
+        states = [generator.bit_generator.state for generator in pool.generators]
+        counts = pool.update(*parallel, 0.05, 0.001)
+
+        serial_counts = [0, 0, 0]
+        for (first, last), state in zip(pool.bands, states):
+            generator = np.random.default_rng()
+            generator.bit_generator.state = state
+            for start in range(first, last, BAND_ROWS):
+                stop = min(start + BAND_ROWS, last)
+                draws = generator.random((stop - start, size), dtype=np.float32)
+                chunk_counts = update_rows(*serial, start, stop, draws, 0.05,
+                                           0.001, scratch)
+                serial_counts = [a + b for a, b in zip(serial_counts, chunk_counts)]
+
+        parallel, serial = parallel[::-1], serial[::-1]
+        if list(counts) != serial_counts or not np.array_equal(parallel[0],
+                                                                 serial[0]):
+            pool.close()
+            return False
+    pool.close()
+    return True
+
+
+def measure_scaling(size=4096, nupdates=20, max_workers=None):
+    """
+    Measure the time per update for an increasing number of threads.
+
+    Args:
+        size(int): The number of cells per side of the forest.
+        nupdates(int): The number of updates to time.
+        max_workers(int or None): The largest number of threads. Defaults to
+            None meaning one thread per cpu.
+
+    Returns:
+        dict: The seconds per update for every number of threads.
+
+    """
+    max_workers = max_workers if max_workers is not None else os.cpu_count()
+    rng = np.random.default_rng()
+    forest = rng.choice(np.array([0, 1], dtype=np.int8), size=(size, size))
+    buffers = (forest, np.empty_like(forest))
+    timings = {}
+    for workers in range(1, max_workers + 1):
+        pool = BandPool(forest.shape, rng, workers)
+        start = perf_counter()
+        for _ in range(nupdates):
+            pool.update(*buffers, 1e-3, 1e-6)
+            buffers = buffers[::-1]
+        timings[workers] = (perf_counter() - start) / nupdates
+        pool.close()
+    return timings
+
+
+if __name__ == "__main__":
+    print("parallel update agrees with serial kernel:", verify_against_serial())
+    for workers, seconds in measure_scaling().items():
+        print(f"{workers} threads: {seconds * 1000:.1f} ms per update")
@@ -6,10 +6,10 @@ import numpy as np
 
 import matplotlib.gridspec as gridspec
 import matplotlib.ticker as ticker
-from matplotlib.colors import LinearSegmentedColormap
 
 HIST_BINS = np.arange(0, 7, 0.3)
-COLOURS = [(0.875, 0.144, 0.105), (0.187, 0, 0), (0.027, 0.457, 0.227)]
+# the most points drawn for a time series
+MAX_POINTS = 2000
 
 PLOTS = {
     "forest": {
@@ -17,10 +17,10 @@ PLOTS = {
         "xlabel": "",
         "ylabel": ""
     },
-    "fitness change": {
-        "title": "Minimum fitness over time",
+    "tree density": {
+        "title": "Tree density over time",
         "xlabel": "time",
-        "ylabel": "minimum fitness"
+        "ylabel": "tree density"
     },
     "avalanche durations": {
         "title": "Histogram of avalanche durations",
@@ -46,7 +46,8 @@ def add_subplots(figure):
     grid = gridspec.GridSpec(ncols=2, nrows=2, figure=figure)
     axes["forest"] = figure.add_subplot(grid[0:, 0])
     axes["forest"].axis("off")
-    axes["fitness change"] = figure.add_subplot(grid[0, 1])
+    axes["tree density"] = figure.add_subplot(grid[0, 1])
+    axes["tree density"].set_ylim(0, 1)
     axes["avalanche durations"] = figure.add_subplot(grid[1, 1])
 
     for plot in PLOTS:
@@ -78,9 +79,8 @@ def add_artists(axes):
     lines = dict()
     # all objects that can be updated by resizing rectangles
     bars = dict()
-    cmap = LinearSegmentedColormap.from_list("forest fire", COLOURS, N=3)
-    default_forest = np.random.randint(0, 3, size=(8, 8)) - 1
-    lines["forest"] = axes["forest"].imshow(default_forest, cmap=cmap)
+
+    lines["tree density"], = axes["tree density"].plot([], [], color="green")
 
     return lines, bars
 
@@ -98,7 +98,12 @@ def update_artists(artists, data):
 
     """
     lines, bars = artists
-    lines["forest"].set_data(data["forest"])
+    # thin out long series, the counts are kept for every update
+    step = max(1, len(data["time series"]) // MAX_POINTS)
+    lines["tree density"].set_data(
+        data["time series"][::step],
+        data["trees series"][::step] / data["system size"] ** 2
+    )
 
 
 def update_axes(axes, data):
@@ -113,10 +118,8 @@ def update_axes(axes, data):
         None.
 
     """
-    axes["fitness"].set_xlim(-0.3, data["system size"] - 0.7)
-    axes["fitness change"].set_xlim(0, data["time"])
-    axes["fitness change"].set_ylim(np.min(data["fitness over time"]) - 0.05,
-                                    np.max(data["fitness over time"]) + 0.05)
+    times = data["time series"]
+    axes["tree density"].set_xlim(times[0], max(times[-1], times[0] + 1))
     axes["avalanche durations"].set_ylim(
         0, np.max(np.histogram(data["avalanche durations"], HIST_BINS)[0]) + 1
     )
@@ -0,0 +1,57 @@
+"""
+Contains a time series of the number of trees, fires and soil cells of a
+forest. Recording a step costs the same for any forest size, and only the
+most recent steps are kept so that the memory used stays fixed.
+"""
+import numpy as np
+
+# the number of updates kept in the time series
+DEFAULT_LENGTH = 100_000
+COLUMNS = ("time", "trees", "fires", "soil")
+
+
+class CountSeries:
+    """A ring buffer of the cell counts after every update"""
+
+    def __init__(self, length=None):
+        """
+        Initialise an empty time series.
+
+        Args:
+            length(int or None): The number of updates kept. Defaults to None
+                meaning DEFAULT_LENGTH.
+
+        """
+        self.length = length if length is not None else DEFAULT_LENGTH
+        self.values = np.zeros((self.length, len(COLUMNS)), dtype=np.int64)
+        self.recorded = 0
+
+    def append(self, time, trees, fires, soil):
+        """
+        Record the counts after an update, overwriting the oldest entry once
+        the series is full.
+
+        Args:
+            time(int): The number of updates.
+            trees(int): The number of trees.
+            fires(int): The number of burning trees.
+            soil(int): The number of soil cells.
+
+        """
+        self.values[self.recorded % self.length] = time, trees, fires, soil
+        self.recorded += 1
+
+    def get(self):
+        """
+        Get the recorded counts from the oldest to the newest entry.
+
+        Returns:
+            dict: One array for each of COLUMNS.
+
+        """
+        if self.recorded <= self.length:
+            values = self.values[:self.recorded]
+        else:
+            values = np.roll(self.values, -(self.recorded % self.length),
+                             axis=0)
+        return {name: values[:, column] for column, name in enumerate(COLUMNS)}
@@ -0,0 +1,83 @@
+"""
+Contains an update for the forest fire model which only visits the cells that
+change, so its cost scales with the activity in the forest instead of its area.
+"""
+import numpy as np
+
+from forestfire import cell_state
+from forestfire.clusters import StateIndex, neighbour_indices
+
+
+class ActiveFront:
+    """
+    Keeps the set of burning cells of a forest. Fire is only propagated from
+    these cells to their neighbours, while the number of growing trees and
+    lightning strikes is drawn from binomial distributions and only that many
+    cells are picked and changed.
+    """
+
+    def __init__(self, forest):
+        """
+        Initialise the active set from an existing forest.
+
+        Args:
+            forest(np.ndarray): The forest.
+
+        """
+        cells = forest.reshape(-1)
+        self.burning = np.flatnonzero(cell_state.is_burning(cells))
+        self.tree_count = int(np.count_nonzero(cell_state.is_tree(cells)))
+        self.soil_count = cells.size - self.tree_count - self.burning.size
+        # soil is rare in a dense forest and trees in a burnt one
+        self.soil_index = StateIndex(cell_state.SOIL)
+        self.tree_index = StateIndex(cell_state.TREE)
+
+    def update(self, forest, rng, tree_growth, lightning_probability):
+        """
+        Advance the forest by one update in place. The outcome follows the
+        same rules and probabilities as update_rows.
+
+        Args:
+            forest(np.ndarray): The forest.
+            rng(np.random.Generator): The random number generator.
+            tree_growth(float): The probability for a tree to grow on soil.
+            lightning_probability(float): The probability for lightning to
+                strike a tree.
+
+        Returns:
+            tuple: The number of trees ignited by a burning neighbour, the
+                number of trees hit by lightning and the number of grown
+                trees.
+
+        """
+        cells = forest.reshape(-1)
+
+        # the frontier: trees next to a burning cell
+        neighbours, inside = neighbour_indices(self.burning, forest.shape)
+        neighbours = np.unique(neighbours[inside])
+        spread = neighbours[cell_state.is_tree(cells[neighbours])]
+
+        # growth is decided on the soil before burnt cells turn to soil
+        grown = self.soil_index.sample(
+            rng, cells, rng.binomial(self.soil_count, tree_growth),
+            self.soil_count
+        )
+
+        # lightning strikes trees which do not catch fire from a neighbour
+        cells[spread] = cell_state.FIRE
+        self.tree_index.update(removed=spread)
+        unburnt = self.tree_count - spread.size
+        struck = self.tree_index.sample(
+            rng, cells, rng.binomial(unburnt, lightning_probability), unburnt
+        )
+        cells[struck] = cell_state.FIRE
+
+        cells[self.burning] = cell_state.SOIL
+        cells[grown] = cell_state.TREE
+        self.tree_index.update(added=grown, removed=struck)
+        self.soil_index.update(added=self.burning, removed=grown)
+
+        self.tree_count += grown.size - spread.size - struck.size
+        self.soil_count += self.burning.size - grown.size
+        self.burning = np.concatenate((spread, struck))
+        return spread.size, struck.size, grown.size
@@ -0,0 +1,163 @@
+"""
+Contains the output of long runs of the forest fire model. Completed
+avalanches are taken from the model in chunks and appended to a binary file,
+so the memory used by a run does not grow with its length. Optionally they
+are also counted in log-binned histograms of a fixed size. The state of the
+run is saved to a checkpoint from time to time, from which it can be resumed.
+
+The binary file holds one record of AVALANCHE_DTYPE per avalanche and can be
+read with np.fromfile or np.memmap.
+"""
+import json
+import os
+
+import numpy as np
+
+AVALANCHE_DTYPE = np.dtype([("size", "<i8"), ("duration", "<i8")])
+# the number of avalanches kept in memory before they are written
+CHUNK_SIZE = 65536
+# ten bins per decade for avalanches of up to 10^12 trees or updates
+HISTOGRAM_BINS = np.logspace(0, 12, 121)
+
+
+class LogHistogram:
+    """Counts values in fixed logarithmic bins"""
+
+    def __init__(self, bins=None):
+        """
+        Initialise an empty histogram.
+
+        Args:
+            bins(np.ndarray or None): The edges of the bins. Defaults to None
+                meaning HISTOGRAM_BINS.
+
+        """
+        self.bins = bins if bins is not None else HISTOGRAM_BINS
+        self.counts = np.zeros(len(self.bins) - 1, dtype=np.int64)
+
+    def add(self, values):
+        """
+        Count values. They are shifted by one so that avalanches of size
+        zero fall into the first bin, values beyond the last edge are counted
+        in the last bin.
+
+        Args:
+            values(np.ndarray): The values to count.
+
+        """
+        index = np.searchsorted(self.bins, np.asarray(values) + 1,
+                                side="right") - 1
+        index = np.clip(index, 0, self.counts.size - 1)
+        self.counts += np.bincount(index, minlength=self.counts.size)
+
+
+def checkpoint_path(prefix):
+    """The path of the checkpoint of a run writing to prefix. """
+    return prefix + "_checkpoint.npz"
+
+
+class AvalancheStream:
+    """Writes the avalanches of a forest fire model to a binary file"""
+
+    def __init__(self, prefix, histograms=True, chunk_size=CHUNK_SIZE,
+                 resume=False):
+        """
+        Initialise the output. The avalanches are written to
+        '<prefix>_avalanches.bin' and the checkpoint to
+        '<prefix>_checkpoint.npz'.
+
+        Args:
+            prefix(str): The common start of the output files.
+            histograms(bool): Whether to keep log-binned histograms of the
+                avalanche sizes and durations.
+            chunk_size(int): The number of completed avalanches collected
+                before they are written.
+            resume(bool): Whether to keep the existing file in order to
+                continue a run, see resume.
+
+        """
+        self.path = prefix + "_avalanches.bin"
+        self.checkpoint_path = checkpoint_path(prefix)
+        self.chunk_size = chunk_size
+        self.histograms = {"sizes": LogHistogram(),
+                           "durations": LogHistogram()} if histograms else None
+        self.records = 0
+        self.file = open(self.path, "ab" if resume else "wb")
+
+    def collect(self, model, force=False):
+        """
+        Move the completed avalanches out of the model and append them to
+        the file once a chunk is complete. An avalanche which is still
+        burning stays in the model.
+
+        Args:
+            model(ForestFireModel): The model of the simulation.
+            force(bool): Write the completed avalanches even if they do not
+                fill a chunk.
+
+        """
+        complete = len(model.avalanche_sizes) - int(model.is_in_avalanche)
+        if complete <= 0 or (complete < self.chunk_size and not force):
+            return
+
+        chunk = np.empty(complete, dtype=AVALANCHE_DTYPE)
+        chunk["size"] = model.avalanche_sizes[:complete]
+        chunk["duration"] = model.avalanche_durations[:complete]
+        chunk.tofile(self.file)
+        del model.avalanche_sizes[:complete]
+        del model.avalanche_durations[:complete]
+        self.records += complete
+        if self.histograms is not None:
+            self.histograms["sizes"].add(chunk["size"])
+            self.histograms["durations"].add(chunk["duration"])
+
+    def save_checkpoint(self, model):
+        """
+        Write all completed avalanches and save the state of the model, so
+        that the run can be continued with resume.
+
+        Args:
+            model(ForestFireModel): The model of the simulation.
+
+        """
+        self.collect(model, force=True)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+        state = model.get_state()
+        state["rng"] = json.dumps(state["rng"])
+        state["records"] = self.records
+        if self.histograms is not None:
+            state["size histogram"] = self.histograms["sizes"].counts
+            state["duration histogram"] = self.histograms["durations"].counts
+        temporary_path = self.checkpoint_path + f".{os.getpid()}.tmp.npz"
+        np.savez(temporary_path, **state)
+        # a run interrupted while saving keeps its previous checkpoint
+        os.replace(temporary_path, self.checkpoint_path)
+
+    def resume(self, model):
+        """
+        Restore the model from the checkpoint and drop the avalanches written
+        after it.
+
+        Args:
+            model(ForestFireModel): The model to restore.
+
+        """
+        with np.load(self.checkpoint_path) as checkpoint:
+            state = {key: checkpoint[key] for key in checkpoint.files}
+        state["rng"] = json.loads(str(state["rng"]))
+        model.set_state(state)
+
+        self.records = int(state["records"])
+        self.file.truncate(self.records * AVALANCHE_DTYPE.itemsize)
+        if "size histogram" not in state:
+            # the avalanches before the checkpoint were not counted
+            self.histograms = None
+        elif self.histograms is not None:
+            self.histograms["sizes"].counts[:] = state["size histogram"]
+            self.histograms["durations"].counts[:] = state["duration histogram"]
+
+    def close(self):
+        """Close the binary file. """
+        self.file.close()
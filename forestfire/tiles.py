@@ -0,0 +1,178 @@
+"""
+Contains an update of the forest fire model distributed over several
+processes. The lattice is split into tiles of whole rows and every process
+updates one tile. Both buffers of the forest live in shared memory, so after
+a barrier each process reads the one-row halos bordering its tile straight
+from the neighbouring tiles and no cells have to be copied between processes.
+The numbers of ignited and grown trees are collected per tile and summed by
+the parent process.
+"""
+import multiprocessing as mp
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from forestfire.kernels import BAND_ROWS, allocate_scratch, update_rows
+
+# commands sent to the worker processes
+UPDATE = 0
+STOP = 1
+
+
+def _attach(name, shape, dtype):
+    """Map a shared memory block to an array"""
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _run_tile(names, shape, first, last, tile, seed, start, done):
+    """
+    The main loop of a worker process updating the rows [first, last).
+
+    Args:
+        names(dict): The names of the shared memory blocks.
+        shape(tuple): The shape of the forest.
+        first(int): The first row of the tile.
+        last(int): The row after the last row of the tile.
+        tile(int): The index of the tile.
+        seed(np.random.SeedSequence): Seeds the random numbers of the tile.
+        start(multiprocessing.Barrier): Passed when an update is requested.
+        done(multiprocessing.Barrier): Passed when the update is complete.
+
+    """
+    blocks, arrays = zip(*(
+        _attach(names["buffer 0"], shape, np.int8),
+        _attach(names["buffer 1"], shape, np.int8),
+        _attach(names["control"], (4, ), np.float64),
+        _attach(names["counts"], (len(names["tiles"]), 3), np.int64)
+    ))
+    buffers, control, counts = arrays[:2], arrays[2], arrays[3]
+    rng = np.random.default_rng(seed)
+    scratch = allocate_scratch(min(BAND_ROWS, last - first), shape[1])
+
+    while True:
+        start.wait()
+        command, source, tree_growth, lightning_probability = control
+        if command == STOP:
+            break
+        source, target = buffers[int(source)], buffers[1 - int(source)]
+        counts[tile] = 0
+        for band in range(first, last, BAND_ROWS):
+            stop = min(band + BAND_ROWS, last)
+            draws = scratch["draws"][:stop - band]
+            rng.random(dtype=np.float32, out=draws)
+            counts[tile] += update_rows(source, target, band, stop, draws,
+                                        tree_growth, lightning_probability,
+                                        scratch)
+        done.wait()
+
+    # the arrays must be released before the shared memory can be closed
+    arrays = buffers = control = counts = source = target = None
+    for block in blocks:
+        block.close()
+
+
+class TilePool:
+    """Updates a forest in shared memory with one process per tile"""
+
+    def __init__(self, forest, rng, workers=None):
+        """
+        Copy the forest into shared memory and start the worker processes.
+
+        Args:
+            forest(np.ndarray): The initial forest.
+            rng(np.random.Generator): Seeds an independent random number
+                generator for every tile.
+            workers(int or None): The number of processes. Defaults to None
+                meaning one process per cpu.
+
+        """
+        workers = workers if workers is not None else mp.cpu_count()
+        nrows = forest.shape[0]
+        edges = np.linspace(0, nrows, min(workers, nrows) + 1).astype(int)
+        tiles = list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+        self.blocks = {
+            "buffer 0": shared_memory.SharedMemory(create=True, size=forest.nbytes),
+            "buffer 1": shared_memory.SharedMemory(create=True, size=forest.nbytes),
+            "control": shared_memory.SharedMemory(create=True, size=4 * 8),
+            "counts": shared_memory.SharedMemory(create=True,
+                                                 size=len(tiles) * 3 * 8)
+        }
+        self.buffers = [
+            np.ndarray(forest.shape, dtype=np.int8, buffer=self.blocks[name].buf)
+            for name in ("buffer 0", "buffer 1")
+        ]
+        self.buffers[0][:] = forest
+        self.control = np.ndarray((4, ), dtype=np.float64,
+                                  buffer=self.blocks["control"].buf)
+        self.counts = np.ndarray((len(tiles), 3), dtype=np.int64,
+                                 buffer=self.blocks["counts"].buf)
+        # index of the buffer holding the current forest
+        self.current = 0
+
+        names = {name: block.name for name, block in self.blocks.items()}
+        names["tiles"] = tiles
+        self.start = mp.Barrier(len(tiles) + 1)
+        self.done = mp.Barrier(len(tiles) + 1)
+        seeds = np.random.SeedSequence(int(rng.integers(2 ** 63))).spawn(len(tiles))
+        self.processes = [
+            mp.Process(target=_run_tile, daemon=True, args=(
+                names, forest.shape, first, last, tile, seeds[tile],
+                self.start, self.done
+            ))
+            for tile, (first, last) in enumerate(tiles)
+        ]
+        for process in self.processes:
+            process.start()
+
+    @property
+    def forest(self):
+        """The current forest as a view of the shared memory. """
+        return self.buffers[self.current]
+
+    def update(self, tree_growth, lightning_probability):
+        """
+        Let all processes update their tiles and wait for them.
+
+        Args:
+            tree_growth(float): The probability for a tree to grow on soil.
+            lightning_probability(float): The probability for lightning to
+                strike a tree.
+
+        Returns:
+            tuple: The number of trees ignited by a burning neighbour, the
+                number of trees hit by lightning and the number of grown
+                trees in the whole forest.
+
+        """
+        self.control[:] = UPDATE, self.current, tree_growth, lightning_probability
+        self.start.wait()
+        self.done.wait()
+        self.current = 1 - self.current
+        return tuple(int(count) for count in self.counts.sum(axis=0))
+
+    def close(self):
+        """
+        Stop the worker processes and free the shared memory.
+
+        Returns:
+            np.ndarray: A private copy of the current forest.
+
+        """
+        forest = self.forest.copy()
+        self.control[0] = STOP
+        self.start.wait()
+        for process in self.processes:
+            process.join()
+        self.buffers = self.control = self.counts = None
+        for block in self.blocks.values():
+            try:
+                block.close()
+            except BufferError:
+                # views handed out earlier keep the mapping alive, the memory
+                # is freed once they are gone
+                pass
+            block.unlink()
+        return forest
@@ -0,0 +1,132 @@
+"""
+Contains a viewer for displaying large forests of the ForestFireModel class
+through a compact uint8 display buffer.
+"""
+import numpy as np
+
+from forestfire import cell_state
+
+# the largest number of pixels per side handed to matplotlib
+MAX_DISPLAY_SIZE = 512
+# rgb colour of each cell state, indexed by state - cell_state.FIRE
+COLOUR_LOOKUP = np.array([
+    (223, 37, 27),  # fire
+    (48, 0, 0),     # soil
+    (7, 117, 58)    # tree
+], dtype=np.uint8)
+
+
+def get_block_size(size, max_display_size=MAX_DISPLAY_SIZE):
+    """
+    Get the number of cells per side which are merged into one pixel.
+
+    Args:
+        size(int): The number of cells per side of the forest.
+        max_display_size(int): The maximum number of pixels per side.
+
+    Returns:
+        int: The edge length of a block of cells shown as one pixel.
+
+    """
+    return max(1, -(-size // max_display_size))
+
+
+def downsample(forest, block_size):
+    """
+    Reduce the forest to one value per block by majority vote. Ties are
+    resolved in favour of fire, so small fires stay visible.
+
+    Args:
+        forest(np.ndarray): The rows of the forest to reduce. The number of
+            rows must be a multiple of the block size.
+        block_size(int): The edge length of a block of cells.
+
+    Returns:
+        np.ndarray: The index into the colour lookup for each block.
+
+    """
+    nrows, ncols = forest.shape
+    missing_cols = -ncols % block_size
+    if missing_cols:
+        forest = np.pad(forest, ((0, 0), (0, missing_cols)),
+                        constant_values=cell_state.SOIL)
+    blocks = forest.reshape(nrows // block_size, block_size, -1, block_size)
+    counts = np.stack([
+        np.count_nonzero(blocks == state, axis=(1, 3))
+        for state in (cell_state.FIRE, cell_state.SOIL, cell_state.TREE)
+    ])
+    return np.argmax(counts, axis=0).astype(np.uint8)
+
+
+class ForestViewer:
+    """Renders a forest into a uint8 image re-drawing only changed rows"""
+
+    def __init__(self, axes, max_display_size=MAX_DISPLAY_SIZE):
+        """
+        Initialise the viewer.
+
+        Args:
+            axes(matplotlib.axes.Axes): The axes to display the forest on.
+            max_display_size(int): The maximum number of pixels per side.
+
+        """
+        self.max_display_size = max_display_size
+        self.image = axes.imshow(np.zeros((1, 1, 3), dtype=np.uint8),
+                                 interpolation="nearest")
+        self.reset()
+
+    def reset(self):
+        """Forget the displayed forest, so the next render draws everything"""
+        self.shown = None
+        self.buffer = None
+        self.block_size = 1
+
+    def _allocate(self, shape):
+        """Allocate the display buffer for a forest of the given shape"""
+        self.block_size = get_block_size(max(shape), self.max_display_size)
+        nrows, ncols = (-(-n // self.block_size) for n in shape)
+        self.buffer = np.empty((nrows, ncols, 3), dtype=np.uint8)
+        # the forest as last rendered, padded to whole blocks
+        self.shown = np.empty((nrows * self.block_size, shape[1]),
+                              dtype=np.int8)
+        self.image.set_extent((-0.5, ncols - 0.5, nrows - 0.5, -0.5))
+
+    def _render_rows(self, forest, first, last):
+        """Render the block rows in [first, last) of the forest"""
+        start, stop = first * self.block_size, last * self.block_size
+        self.shown[start:stop] = cell_state.SOIL
+        self.shown[start:min(stop, forest.shape[0])] = forest[start:stop]
+        if self.block_size == 1:
+            indices = self.shown[start:stop] - cell_state.FIRE
+        else:
+            indices = downsample(self.shown[start:stop], self.block_size)
+        self.buffer[first:last] = COLOUR_LOOKUP[indices]
+
+    def render(self, forest):
+        """
+        Update the displayed image to show the given forest.
+
+        Args:
+            forest(np.ndarray): The current state of the forest.
+
+        Returns:
+            None.
+
+        """
+        if self.shown is None or forest.shape[1] != self.shown.shape[1] \
+                or -(-forest.shape[0] // self.block_size) != self.buffer.shape[0]:
+            self._allocate(forest.shape)
+            self._render_rows(forest, 0, self.buffer.shape[0])
+        else:
+            nrows = forest.shape[0]
+            changed = np.zeros(self.shown.shape[0], dtype=bool)
+            changed[:nrows] = np.any(forest != self.shown[:nrows], axis=1)
+            changed = np.any(changed.reshape(-1, self.block_size), axis=1)
+            if not changed.any():
+                return
+            # re-render each run of consecutive changed block rows at once
+            edges = np.flatnonzero(np.diff(np.concatenate(([0], changed, [0]))))
+            for first, last in zip(edges[::2], edges[1::2]):
+                self._render_rows(forest, first, last)
+
+        self.image.set_data(self.buffer)
@@ -1,25 +1,57 @@
+import os
+
+from functools import partial
 from sys import argv
+from time import perf_counter
+
+import numpy as np
 
 from numpy import savetxt
 
 from forestfire.model import ForestFireModel
 
-try:
-    from forestfire.engine import ForestFireEngine
-    TKINTER_INSTALLED = True
-except ImportError as err:
-    ERRMSG = "\n".join((
-        "Import Error: {}\n".format(err),
-        "Install python-tkinter if you want to use the graphical user interface.",
-        "(sudo apt-get install python3-tk).",
-        "You may also run the script over the command line by adding 'nogui' " \
-        "and supply the system size (-s) and the " \
-        "number of updates (-u) as command line arguments. If no number of " \
-        "updates is supplied the script will run until it is faces a Keyboard " \
-        "interrupt (Ctrl + C)\n",
-        "Example: forestfire_main.py nogui -f=0.0001 -t=0.007"
-    ))
-    TKINTER_INSTALLED = False
+ERRMSG = "\n".join((
+    "Import Error: {}\n",
+    "Install python-tkinter if you want to use the graphical user interface.",
+    "(sudo apt-get install python3-tk).",
+    "You may also run the script over the command line by adding 'nogui' " \
+    "and supply the system size (-s), the update algorithm (-m), the " \
+    "implementation of the update (-b=dense, sparse, threads or " \
+    "processes) and the number of updates (-u) as command line " \
+    "arguments. If no number of " \
+    "updates is supplied the script will run until it is faces a Keyboard " \
+    "interrupt (Ctrl + C)\n",
+    "Add --monitor=<port> to serve live metrics of the run over http.",
+    "Add --output=<prefix> to stream the avalanches to a binary file and " \
+    "save checkpoints, 'resume' to continue from the last checkpoint and " \
+    "'nohist' to skip the log-binned histograms.",
+    "Example: forestfire_main.py nogui -f=0.0001 -t=0.007"
+))
+
+# logarithmic bins for the histograms of avalanche sizes and durations
+MONITOR_BINS = np.logspace(0, 8, 33)
+# seconds between two checkpoints of a streaming run
+CHECKPOINT_INTERVAL = 600
+
+
+def load_engine():
+    """
+    Import the graphical user interface. This is deferred until it is needed,
+    so that runs without it do not pay for loading tkinter and matplotlib.
+
+    Args:
+        None.
+
+    Returns:
+        type or None: The engine class or None if tkinter is not installed.
+
+    """
+    try:
+        from forestfire.engine import ForestFireEngine
+    except ImportError as err:
+        print(ERRMSG.format(err))
+        return None
+    return ForestFireEngine
 
 
 def _convert(string_value, conversion_type):
@@ -31,16 +63,15 @@ def _convert(string_value, conversion_type):
         conversion_type(type): The type to cast to.
 
     Returns:
-        type: The casted value.
+        type or None: The casted value or None if it could not be converted.
 
     """
     try:
-        converted_value = conversion_type(string_value)
-    except ValueError as err:
+        return conversion_type(string_value)
+    except ValueError:
         print("Could not convert input '{}' to {}".format(string_value,
                                                           conversion_type))
-
-    return converted_value
+        return None
 
 
 def parse_command_line_args():
@@ -60,49 +91,200 @@ def parse_command_line_args():
     nupdates = None
     tree_probability = None
     fire_probability = None
+    mode = None
+    backend = None
+    monitor_address = None
+    output = None
+    resume = False
+    histograms = True
     # the first command line argument is always the name of the script.
     command_line_args = argv[1:]
 
     for arg in command_line_args:
-        if "nogui" in arg:
+        name, _, value = arg.partition("=")
+        if arg == "nogui":
             use_gui = False
-        elif "-s" in arg:
-            size = _convert(arg.split("=")[1], int)
-        elif "-u" in arg:
-            nupdates = _convert(arg.split("=")[1], int)
-        elif "-t" in arg:
-            tree_probability = _convert(arg.split("=")[1], float)
-        elif "-f" in arg:
-            fire_probability = _convert(arg.split("=")[1], float)
-    return use_gui, size, nupdates, tree_probability, fire_probability
-
-
-def nogui_simulation(size, lightning_probability, tree_growth, nupdates):
+        elif arg == "resume":
+            resume = True
+        elif arg == "nohist":
+            histograms = False
+        elif name == "--monitor" and value:
+            monitor_address = value
+        elif name == "--output" and value:
+            output = value
+        elif name == "-s":
+            size = _convert(value, int)
+        elif name == "-u":
+            nupdates = _convert(value, int)
+        elif name == "-t":
+            tree_probability = _convert(value, float)
+        elif name == "-f":
+            fire_probability = _convert(value, float)
+        elif name == "-m":
+            mode = _convert(value, int)
+        elif name == "-b":
+            backend = value
+        else:
+            print(f"Ignoring unknown argument '{arg}'")
+    return (use_gui, size, nupdates, tree_probability, fire_probability,
+            mode, backend, monitor_address, output, resume, histograms)
+
+
+def describe(model, stream=None, histograms=None):
+    """
+    Collect the metrics of a running forest fire simulation.
+
+    Args:
+        model(ForestFireModel): The model of the simulation.
+        stream(AvalancheStream or None): If it keeps histograms, they are
+            reported instead of the avalanches held by the model.
+        histograms(dict or None): Running histograms of the avalanche
+            'sizes' and 'durations' of the model kept between requests, see
+            monitor_histograms. Defaults to None meaning all avalanches are
+            counted again.
+
+    Returns:
+        dict: The metrics of the simulation.
+
+    """
+    metrics = {
+        "system size": model.size,
+        "tree density": model.tree_count / model.size ** 2,
+        "burning trees": model.fire_count
+    }
+    if stream is not None and stream.histograms is not None:
+        # bins of avalanche size + 1, the model only holds the avalanches
+        # which are not written yet
+        metrics["written avalanches"] = stream.records
+        for name in ("sizes", "durations"):
+            metrics[f"avalanche {name}"] = {
+                "bins": stream.histograms[name].bins.tolist(),
+                "counts": stream.histograms[name].counts.tolist()
+            }
+        return metrics
+
+    if histograms is None or stream is not None:
+        # a stream removes written avalanches from the model, so only the
+        # ones it still holds are counted
+        histograms = monitor_histograms()
+    # the last avalanche still grows while it is in progress
+    complete = len(model.avalanche_sizes) - int(model.is_in_avalanche)
+    for name in ("sizes", "durations"):
+        metrics[f"avalanche {name}"] = histograms[name].update(
+            getattr(model, f"avalanche_{name}"), complete)
+    return metrics
+
+
+def monitor_histograms():
+    """Create the running histograms of the avalanches for describe. """
+    from simulations.monitor import RunningHistogram
+
+    return {name: RunningHistogram(MONITOR_BINS)
+            for name in ("sizes", "durations")}
+
+
+def snapshot(model):
+    """Get a downsampled copy of the forest. """
+    from simulations.monitor import downsample
+
+    return downsample(model.forest)
+
+
+def nogui_simulation(size, lightning_probability, tree_growth, nupdates,
+                     updatemode=None, backend=None, monitor_address=None,
+                     output=None, resume=False, histograms=True):
     """
     Simulation without the graphical user interface.
 
     Args:
         size(int): The system size for the simulation.
+        lightning_probability(float): The probability for a tree to be hit
+            by lightning.
+        tree_growth(float): The probability for a tree to grow on soil.
+        nupdates(int): The number of updates to perform. If nupdates is None
+            an infinite while loop will be started until interrupted.
+        updatemode(int or None): The algorithm to use for the updates.
+            1 - fire spreads to neighbouring trees in each update
+            2 - lightning burns the whole cluster instantly
+        backend(str or None): The implementation of the update with
+            spreading fire, 'dense', 'sparse', 'threads' or 'processes'.
+        monitor_address(str or None): If given, serve live metrics of the
+            simulation on this address, see simulations.monitor.
+        output(str or None): If given, completed avalanches are streamed to
+            '<output>_avalanches.bin' and the run is saved to
+            '<output>_checkpoint.npz' every CHECKPOINT_INTERVAL seconds, see
+            forestfire.stream. Otherwise all avalanches are kept in memory
+            and saved as text at the end.
+        resume(bool): Continue from the checkpoint of output. nupdates is
+            then the total number of updates including the resumed ones.
+        histograms(bool): Whether a streaming run keeps log-binned
+            histograms of the avalanches.
 
     Returns:
         None.
 
     """
-    model = ForestFireModel(size, lightning_probability, tree_growth)
+    model = ForestFireModel(size, lightning_probability, tree_growth,
+                            updatemode=updatemode, backend=backend)
 
-    if nupdates is not None:
-        for update in range(nupdates):
+    stream = None
+    if output is not None:
+        from forestfire.stream import AvalancheStream, checkpoint_path
+
+        if resume and not os.path.exists(checkpoint_path(output)):
+            # starting over would overwrite the avalanches of the earlier run
+            print(f"No checkpoint found at {checkpoint_path(output)}, "
+                  "run without 'resume' to start a new run.")
+            return
+        stream = AvalancheStream(output, histograms, resume=resume)
+        if resume:
+            stream.resume(model)
+            print(f"resuming at {model.time} iterations.")
+        last_checkpoint = perf_counter()
+
+    monitor = None
+    if monitor_address is not None:
+        from simulations.monitor import MonitorServer
+
+        monitor = MonitorServer(model,
+                                partial(describe, stream=stream,
+                                        histograms=monitor_histograms()),
+                                snapshot, monitor_address)
+        try:
+            monitor.start()
+        except OSError as err:
+            # e.g. the port is used by another run, which is no reason to
+            # lose this one
+            print(f"Could not serve metrics on {monitor_address}: {err}. "
+                  "Continuing without the monitor.")
+            monitor = None
+
+    while nupdates is None or model.time < nupdates:
+        try:
             model.update()
-            if not (model.time % 1000):
+        except KeyboardInterrupt:
+            break
+        if not (model.time % 1000):
+            if nupdates is not None:
                 print(f"completed {model.time}/{nupdates} iterations.")
-    else:
-        while True:
-            try:
-                model.update()
-                if not (model.time % 1000):
-                    print(f"completed {model.time} iterations.")
-            except KeyboardInterrupt:
-                break
+            else:
+                print(f"completed {model.time} iterations.")
+        if stream is not None:
+            stream.collect(model)
+            if perf_counter() - last_checkpoint > CHECKPOINT_INTERVAL:
+                stream.save_checkpoint(model)
+                last_checkpoint = perf_counter()
+
+    if monitor is not None:
+        monitor.stop()
+    model.release_workers()
+
+    if stream is not None:
+        print("Stopping simulation and saving checkpoint...")
+        stream.save_checkpoint(model)
+        stream.close()
+        print(f"{stream.records} avalanches written to {stream.path}.")
+        return
 
     data = model.get_data()
     meta_info = "\n".join((
@@ -119,20 +301,27 @@ def nogui_simulation(size, lightning_probability, tree_growth, nupdates):
 
 def main():
     """Main function of the script. """
-    use_gui, size, nupdates, tree_probability, fire_probability = parse_command_line_args()
-
-    if use_gui and not TKINTER_INSTALLED:
-        print(ERRMSG)
-        return
+    (use_gui, size, nupdates, tree_probability, fire_probability, mode,
+     backend, monitor_address, output, resume,
+     histograms) = parse_command_line_args()
 
     if use_gui:
-        if any([p is not None for p in (nupdates, size, tree_probability, fire_probability)]):
+        engine_class = load_engine()
+        if engine_class is None:
+            return
+
+        if any([p is not None for p in (nupdates, size, tree_probability,
+                                        fire_probability, mode, backend,
+                                        monitor_address, output)]) \
+                or resume or not histograms:
             print("Warning: Some command line parameters are ignored.")
 
-        engine = ForestFireEngine()
+        engine = engine_class()
         engine.mainloop()
     else:
-        nogui_simulation(size, fire_probability, tree_probability, nupdates)
+        nogui_simulation(size, fire_probability, tree_probability, nupdates,
+                         mode, backend, monitor_address, output, resume,
+                         histograms)
 
 
 if __name__ == "__main__":
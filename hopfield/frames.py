@@ -0,0 +1,218 @@
+"""
+Reads and writes ±1 images in a bit-packed binary container holding any
+number of frames of the same shape.
+
+Layout (little endian):
+    header  4 bytes magic b"HOPF", uint16 version, uint16 reserved,
+            uint32 height, uint32 width
+    frame   int64 step, then height * width bits in row-major order, most
+            significant bit first, 1 for +1 and 0 for -1, padded with zero
+            bits to whole bytes
+
+The number of frames follows from the size of the file, so frames can be
+appended while others read it. hopfield.cpp writes its progress in this
+format.
+
+Usage:
+    python frames.py pack <image.dat> [...] <container.hfb>
+    python frames.py unpack <container.hfb>
+"""
+import os
+
+from sys import argv
+
+import numpy as np
+
+MAGIC = b"HOPF"
+VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S4"), ("version", "<u2"),
+                         ("reserved", "<u2"), ("height", "<u4"),
+                         ("width", "<u4")])
+
+
+def frame_dtype(height, width):
+    """The record of a single frame of the given shape"""
+    return np.dtype([("step", "<i8"),
+                     ("bits", "u1", ((height * width + 7) // 8, ))])
+
+
+def names_path(container):
+    """The path of the optional file naming the frames of a container"""
+    return os.path.splitext(container)[0] + ".names"
+
+
+def pack(image):
+    """
+    Pack a ±1 image into bits.
+
+    Args:
+        image(np.ndarray): The image.
+
+    Returns:
+        np.ndarray: One bit per pixel as bytes.
+
+    """
+    return np.packbits(np.asarray(image).reshape(-1) > 0)
+
+
+def unpack(bits, height, width):
+    """
+    Unpack bits into a ±1 image.
+
+    Args:
+        bits(np.ndarray): The packed bytes.
+        height(int): The number of rows of the image.
+        width(int): The number of columns of the image.
+
+    Returns:
+        np.ndarray: The image as int8.
+
+    """
+    pixels = np.unpackbits(bits, count=height * width).astype(np.int8)
+    return (2 * pixels - 1).reshape(height, width)
+
+
+class FrameWriter:
+    """Appends frames to a container"""
+
+    def __init__(self, path, shape, append=False):
+        """
+        Open a container for writing.
+
+        Args:
+            path(str): The path of the container.
+            shape(tuple): The height and width of the frames.
+            append(bool): Whether to add to an existing container of the same
+                shape instead of starting a new one.
+
+        """
+        self.height, self.width = shape
+        self.dtype = frame_dtype(self.height, self.width)
+        if append:
+            header = read_header(path)
+            if (header["height"], header["width"]) != (self.height, self.width):
+                raise ValueError(f"{path} holds frames of another shape")
+            self.file = open(path, "ab")
+        else:
+            self.file = open(path, "wb")
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header[0] = MAGIC, VERSION, 0, self.height, self.width
+            header.tofile(self.file)
+
+    def append(self, image, step=0):
+        """
+        Add a frame.
+
+        Args:
+            image(np.ndarray): The ±1 image.
+            step(int): The label of the frame, e.g. the update it was taken
+                at.
+
+        """
+        self.append_packed(pack(image), step)
+
+    def append_packed(self, bits, step=0):
+        """
+        Add a frame which is already packed.
+
+        Args:
+            bits(np.ndarray): The packed bytes, see pack.
+            step(int): The label of the frame.
+
+        """
+        frame = np.zeros(1, dtype=self.dtype)
+        frame["step"] = step
+        frame["bits"] = bits
+        frame.tofile(self.file)
+        self.file.flush()
+
+    def close(self):
+        """Close the container. """
+        self.file.close()
+
+
+def read_header(path):
+    """
+    Read and check the header of a container.
+
+    Args:
+        path(str): The path of the container.
+
+    Returns:
+        np.void: The header.
+
+    """
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if header.size == 0 or header[0]["magic"] != MAGIC:
+        raise ValueError(f"{path} is not a frame container")
+    if header[0]["version"] != VERSION:
+        raise ValueError(f"{path} has the unknown version {header[0]['version']}")
+    return header[0]
+
+
+class FrameReader:
+    """Reads the frames of a container lazily from a memory map"""
+
+    def __init__(self, path):
+        """
+        Open a container for reading. Frames appended later are not seen.
+
+        Args:
+            path(str): The path of the container.
+
+        """
+        header = read_header(path)
+        self.height, self.width = int(header["height"]), int(header["width"])
+        dtype = frame_dtype(self.height, self.width)
+        with open(path, "rb") as file:
+            nframes = (file.seek(0, 2) - HEADER_DTYPE.itemsize) // dtype.itemsize
+        self.frames = np.memmap(path, dtype=dtype, mode="r",
+                                offset=HEADER_DTYPE.itemsize,
+                                shape=(nframes, )) if nframes else \
+                      np.zeros(0, dtype=dtype)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, index):
+        """The image of a frame, unpacked when it is requested. """
+        return unpack(self.frames[index]["bits"], self.height, self.width)
+
+    def read_all(self):
+        """
+        Unpack all frames at once.
+
+        Returns:
+            np.ndarray: The images as an int8 array of shape
+                (frames, height, width).
+
+        """
+        pixels = np.unpackbits(self.frames["bits"], axis=1,
+                               count=self.height * self.width).astype(np.int8)
+        return (2 * pixels - 1).reshape(-1, self.height, self.width)
+
+    @property
+    def steps(self):
+        """The labels of all frames. """
+        return np.asarray(self.frames["step"])
+
+
+def main():
+    """Convert between text images and containers. """
+    if len(argv) > 3 and argv[1] == "pack":
+        images = [np.loadtxt(path) for path in argv[2:-1]]
+        writer = FrameWriter(argv[-1], images[0].shape)
+        for step, image in enumerate(images):
+            writer.append(image, step)
+        writer.close()
+    elif len(argv) == 3 and argv[1] == "unpack":
+        reader = FrameReader(argv[2])
+        for index, step in enumerate(reader.steps):
+            np.savetxt(argv[2].replace(".hfb", f"_{step}.dat"), reader[index],
+                       fmt="%i")
+    else:
+        print(__doc__)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,9 @@
 #include <sstream>
 #include <filesystem>
 #include <random>
+#include <cstdint>
+#include <cstdlib>
+#include <cstring>
 
 namespace fs = std::filesystem;
 
@@ -12,10 +15,78 @@ using std::vector;
 #define IMAGE_HEIGHT 100
 #define IMAGE_WIDTH 100
 #define NPIXELS (IMAGE_HEIGHT * IMAGE_WIDTH)
+// layout of the bit-packed frame container, see frames.py
+#define FRAME_MAGIC "HOPF"
+#define FRAME_VERSION 1
+#define FRAME_BYTES ((NPIXELS + 7) / 8)
+
+
+vector<vector<vector<signed char>>> read_frames(const std::string source) {
+  // read all frames of a container into a 3d vector
+  std::ifstream source_file(source, std::ios::binary);
+  char magic[4];
+  uint16_t version, reserved;
+  uint32_t height, width;
+  source_file.read(magic, 4);
+  source_file.read((char *) &version, sizeof(version));
+  source_file.read((char *) &reserved, sizeof(reserved));
+  source_file.read((char *) &height, sizeof(height));
+  source_file.read((char *) &width, sizeof(width));
+  if (!source_file || std::memcmp(magic, FRAME_MAGIC, 4) || version != FRAME_VERSION) {
+    std::cerr << source << " is not a frame container" << std::endl;
+    std::exit(1);
+  }
+  if (height != IMAGE_HEIGHT || width != IMAGE_WIDTH) {
+    std::cerr << source << " holds frames of " << height << "x" << width
+              << " pixels, not " << IMAGE_HEIGHT << "x" << IMAGE_WIDTH << std::endl;
+    std::exit(1);
+  }
+
+  vector<vector<vector<signed char>>> frames;
+  vector<unsigned char> bits((height * width + 7) / 8);
+  int64_t step;
+  while (source_file.read((char *) &step, sizeof(step))
+         && source_file.read((char *) bits.data(), bits.size())) {
+    vector<vector<signed char>> data(height, vector<signed char>(width));
+    for (uint32_t pixel = 0; pixel < height * width; pixel++) {
+      bool set = bits[pixel / 8] & (0x80 >> (pixel % 8));
+      data[pixel / width][pixel % width] = set ? 1 : -1;
+    }
+    frames.push_back(data);
+  }
+  if (frames.empty()) {
+    std::cerr << source << " holds no frames" << std::endl;
+    std::exit(1);
+  }
+  return frames;
+}
+
+
+void check_shape(const vector<vector<signed char>> & image,
+                 const std::string source) {
+  // stop unless an image has IMAGE_HEIGHT rows of IMAGE_WIDTH pixels
+  bool valid = image.size() == IMAGE_HEIGHT;
+  for (const vector<signed char> & row : image)
+    valid = valid && row.size() == IMAGE_WIDTH;
+  if (!valid) {
+    std::cerr << source << " is not an image of " << IMAGE_HEIGHT << "x"
+              << IMAGE_WIDTH << " pixels" << std::endl;
+    std::exit(1);
+  }
+}
+
+
+bool has_suffix(const std::string path, const std::string suffix) {
+  return path.size() > suffix.size()
+         && path.compare(path.size() - suffix.size(), suffix.size(), suffix) == 0;
+}
 
 
 vector<vector<signed char>> read_in(const std::string source) {
-  // read in data from a txt file into a 2d vector
+  // read in data from a txt file or a frame container into a 2d vector
+  if (has_suffix(source, ".hfb"))
+    return read_frames(source)[0];
+
   vector<vector<signed char>> data;
   std::ifstream source_file(source);
 
@@ -30,7 +101,8 @@ vector<vector<signed char>> read_in(const std::string source) {
     {
       line_entries.push_back(value);
     }
-    data.push_back(line_entries);
+    if (!line_entries.empty())
+      data.push_back(line_entries);
   }
   return data;
 }
@@ -49,56 +121,105 @@ void dump(const vector<vector<signed char>> image, const std::string target) {
 }
 
 
+void write_frame_header(std::ofstream & target_file) {
+  // start a frame container for images of IMAGE_HEIGHT x IMAGE_WIDTH
+  uint16_t version = FRAME_VERSION, reserved = 0;
+  uint32_t height = IMAGE_HEIGHT, width = IMAGE_WIDTH;
+  target_file.write(FRAME_MAGIC, 4);
+  target_file.write((const char *) &version, sizeof(version));
+  target_file.write((const char *) &reserved, sizeof(reserved));
+  target_file.write((const char *) &height, sizeof(height));
+  target_file.write((const char *) &width, sizeof(width));
+}
+
+
+void append_frame(const vector<vector<signed char>> & image, int64_t step,
+                  std::ofstream & target_file) {
+  // append an image to a frame container with one bit per pixel
+  unsigned char bits[FRAME_BYTES] = {0};
+  for (int pixel = 0; pixel < NPIXELS; pixel++) {
+    if (image[pixel / IMAGE_WIDTH][pixel % IMAGE_WIDTH] > 0)
+      bits[pixel / 8] |= 0x80 >> (pixel % 8);
+  }
+  target_file.write((const char *) &step, sizeof(step));
+  target_file.write((const char *) bits, FRAME_BYTES);
+  target_file.flush();
+}
+
+
 vector<vector<vector<signed char>>> read_into_memory(const std::string file_directory) {
-  // reads in images stored in txt files into a 3d array
+  // reads in images stored in txt files or frame containers into a 3d array,
+  // every frame of a container is an image of its own
   vector<vector<vector<signed char>>> memory;
   for (const auto & entry : fs::directory_iterator(file_directory)) {
-    memory.push_back(read_in(entry.path()));
+    const std::string path = entry.path();
+    if (has_suffix(path, ".hfb")) {
+      for (const vector<vector<signed char>> & image : read_frames(path))
+        memory.push_back(image);
+    } else if (has_suffix(path, ".dat")) {
+      memory.push_back(read_in(path));
+      check_shape(memory.back(), path);
+    }
   }
   return memory;
 }
 
 
-vector<vector<int>> calculate_weights() {
-  vector<vector<vector<signed char>>> memory = read_into_memory("memory");
-  vector<vector<int>> weights;
-  for (int pixel_i = 0; pixel_i < NPIXELS; pixel_i++) {
-    vector<int> columns;
-    for (int pixel_j = 0; pixel_j < NPIXELS; pixel_j++) {
-      int weight = 0;
-      for (vector<vector<signed char>> & image : memory) {
-        weight += image[pixel_i / IMAGE_WIDTH][pixel_i % IMAGE_WIDTH] * image[pixel_j / IMAGE_WIDTH][pixel_j % IMAGE_WIDTH];
-      }
-      columns.push_back(weight);
-    }
-    weights.push_back(columns);
+vector<vector<signed char>> read_patterns() {
+  // flatten the stored images into one row of NPIXELS values per pattern
+  vector<vector<signed char>> patterns;
+  for (const vector<vector<signed char>> & image : read_into_memory("memory")) {
+    vector<signed char> pattern;
+    for (const vector<signed char> & row : image)
+      pattern.insert(pattern.end(), row.begin(), row.end());
+    patterns.push_back(pattern);
   }
-  return weights;
+  return patterns;
 }
 
 
 int main(int argc, char** argv) {
-  vector<vector<int>> weights = calculate_weights();
+  // the weights w_ij = sum over patterns of p_i * p_j are never built, the
+  // field sum_j w_ij s_j equals sum over patterns of p_i * (p . s), and the
+  // overlaps p . s are updated whenever a pixel flips
+  vector<vector<signed char>> patterns = read_patterns();
+  if (argc < 2) {
+    std::cerr << "usage: " << argv[0] << " <probe>" << std::endl;
+    return 1;
+  }
   vector<vector<signed char>> sample = read_in(argv[1]);
+  check_shape(sample, argv[1]);
   dump(sample, "input_start.dat");
 
+  vector<int> overlaps(patterns.size(), 0);
+  for (size_t mu = 0; mu < patterns.size(); mu++) {
+    for (int pixel_j = 0; pixel_j < NPIXELS; pixel_j++)
+      overlaps[mu] += patterns[mu][pixel_j] * sample[pixel_j / IMAGE_WIDTH][pixel_j % IMAGE_WIDTH];
+  }
+
   std::random_device rd;
   std::mt19937 gen(rd());
   std::uniform_int_distribution<> get_random_pixel(0, NPIXELS - 1);
 
+  std::ofstream progress("progress/progress.hfb", std::ios::binary);
+  write_frame_header(progress);
+
   for (int n = 0; n < 10 * NPIXELS; n++) {
     int pixel_i = get_random_pixel(gen);
     int tmp = 0;
-    for (int pixel_j = 0; pixel_j < NPIXELS; pixel_j++)
-      tmp += weights[pixel_i][pixel_j] * sample[pixel_j / IMAGE_WIDTH][pixel_j % IMAGE_WIDTH];
-
-    sample[pixel_i / IMAGE_WIDTH][pixel_i % IMAGE_WIDTH] = (tmp < 0 ? -1 : 1);
-
-    if (n % 10000 == 0) {
-      std::stringstream filename;
-      filename << "progress/step_" << n << ".dat";
-      dump(sample, filename.str());
+    for (size_t mu = 0; mu < patterns.size(); mu++)
+      tmp += patterns[mu][pixel_i] * overlaps[mu];
+
+    signed char & pixel = sample[pixel_i / IMAGE_WIDTH][pixel_i % IMAGE_WIDTH];
+    signed char value = (tmp < 0 ? -1 : 1);
+    if (value != pixel) {
+      for (size_t mu = 0; mu < patterns.size(); mu++)
+        overlaps[mu] += patterns[mu][pixel_i] * (value - pixel);
+      pixel = value;
     }
+
+    if (n % 10000 == 0)
+      append_frame(sample, n, progress);
   }
   dump(sample, "input_end.dat");
 }
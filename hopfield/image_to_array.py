@@ -2,6 +2,8 @@ import numpy as np
 import matplotlib.image as mpimg
 from sys import argv
 
+from frames import FrameWriter
+
 
 def parse(img):
     array = mpimg.imread(img)
@@ -11,4 +13,11 @@ def parse(img):
 
 
 if __name__ == "__main__":
-    np.savetxt(argv[1].replace(".png", ".dat"), parse(argv[1]),fmt='%i')
+    array = parse(argv[1])
+    # with --binary the image is written as a bit-packed frame container
+    if "--binary" in argv:
+        writer = FrameWriter(argv[1].replace(".png", ".hfb"), array.shape)
+        writer.append(array)
+        writer.close()
+    else:
+        np.savetxt(argv[1].replace(".png", ".dat"), array, fmt='%i')
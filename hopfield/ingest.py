@@ -0,0 +1,130 @@
+"""
+Converts whole directories of images into ±1 patterns in parallel and writes
+them to a single frame container, see frames.py. Every image is converted to
+grey, resized to the fixed size of the model and thresholded at its mean
+brightness like image_to_array.py. The names of the images are written next
+to the container, one per line, with the suffix '.names'.
+
+A container placed in memory/ is read as one pattern per frame by
+hopfield.cpp and recall.py.
+
+Usage:
+    python ingest.py <directory or image> [...] -o=<dataset.hfb>
+        [-s=<height>x<width>] [-j=<workers>]
+"""
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from sys import argv
+
+import numpy as np
+
+from PIL import Image
+
+from frames import FrameWriter, names_path, pack
+
+# the size of the images in hopfield.cpp
+IMAGE_HEIGHT = 100
+IMAGE_WIDTH = 100
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tif", ".tiff")
+
+
+def find_images(paths):
+    """
+    List the images in directories.
+
+    Args:
+        paths(list): Directories or single images.
+
+    Returns:
+        list: The paths of the images, sorted within each directory.
+
+    """
+    images = []
+    for path in paths:
+        if os.path.isdir(path):
+            images.extend(os.path.join(path, name)
+                          for name in sorted(os.listdir(path))
+                          if name.lower().endswith(IMAGE_SUFFIXES))
+        else:
+            images.append(path)
+    return images
+
+
+def convert(path, shape=(IMAGE_HEIGHT, IMAGE_WIDTH)):
+    """
+    Convert an image into a ±1 pattern.
+
+    Args:
+        path(str): The path of the image.
+        shape(tuple): The height and width of the pattern.
+
+    Returns:
+        np.ndarray: The pattern as int8, +1 for pixels brighter than the
+            mean.
+
+    """
+    with Image.open(path) as image:
+        grey = image.convert("L").resize((shape[1], shape[0]), Image.BILINEAR)
+        brightness = np.asarray(grey, dtype=np.float32)
+    return np.where(brightness > brightness.mean(), 1, -1).astype(np.int8)
+
+
+def _convert_packed(path, shape):
+    """Convert an image and pack it, which keeps the results sent back small"""
+    return pack(convert(path, shape))
+
+
+def ingest(images, target, shape=(IMAGE_HEIGHT, IMAGE_WIDTH), workers=None):
+    """
+    Convert images in parallel and write them to a container.
+
+    Args:
+        images(list): The paths of the images.
+        target(str): The path of the container.
+        shape(tuple): The height and width of the patterns.
+        workers(int or None): The number of processes. Defaults to None
+            meaning one process per cpu.
+
+    """
+    workers = workers or os.cpu_count() or 1
+    # a few chunks per worker balance the load with little overhead
+    chunksize = max(1, len(images) // (4 * workers))
+    writer = FrameWriter(target, shape)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for index, bits in enumerate(executor.map(
+                _convert_packed, images, [shape] * len(images),
+                chunksize=chunksize)):
+            writer.append_packed(bits, index)
+    writer.close()
+
+    with open(names_path(target), "w") as file:
+        file.writelines(os.path.basename(image) + "\n" for image in images)
+
+
+def main():
+    """Ingest the images given on the command line. """
+    target = None
+    shape = (IMAGE_HEIGHT, IMAGE_WIDTH)
+    workers = None
+    paths = []
+    for arg in argv[1:]:
+        if arg.startswith("-o="):
+            target = arg.split("=")[1]
+        elif arg.startswith("-s="):
+            shape = tuple(int(size) for size in arg.split("=")[1].split("x"))
+        elif arg.startswith("-j="):
+            workers = int(arg.split("=")[1])
+        else:
+            paths.append(arg)
+
+    images = find_images(paths)
+    if target is None or not images:
+        print(__doc__)
+        return
+    ingest(images, target, shape, workers)
+    print(f"{len(images)} images written to {target}")
+
+
+if __name__ == "__main__":
+    main()
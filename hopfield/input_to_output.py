@@ -1,16 +1,24 @@
 import matplotlib.pyplot as plt
-import numpy as np
 
+from frames import FrameReader
 
-if __name__ == "__main__":
+
+def plot_progress(source="progress/progress.hfb", target="result.png"):
+    """Plot the first nine progress frames of a run into a grid. """
     fig = plt.figure()
     fig.suptitle("Memorisation process in the Hopfield Model")
 
-    for idx in range(9):
+    # only the nine plotted frames are unpacked
+    progress = FrameReader(source)
+    for idx in range(min(9, len(progress))):
         ax = plt.subplot(int(f"33{idx + 1}"))
         ax.set_axis_off()
-        image = np.loadtxt("progress/step_{}{}.dat".format(idx, "0" * 4 if idx else ""))
-        ax.imshow(image, cmap="binary", aspect="equal")
+        ax.imshow(progress[idx], cmap="binary", aspect="equal")
 
     plt.tight_layout()
-    plt.savefig("result.png")
+    plt.savefig(target)
+    plt.close(fig)
+
+
+if __name__ == "__main__":
+    plot_progress()
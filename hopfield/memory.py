@@ -0,0 +1,82 @@
+"""
+Contains a cache of the stored patterns and the weight matrix of a memory
+directory. An entry is addressed by a hash of the names and contents of the
+memory images, so it stays valid until the memory changes, and it holds
+.npy files which are memory mapped when loaded.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+from recall import (IMAGE_SUFFIXES, MEMORY_DIRECTORY, build_weights,
+                    load_patterns)
+
+CACHE_DIRECTORY = ".hopfield_cache"
+
+
+def memory_hash(directory=MEMORY_DIRECTORY):
+    """
+    Hash the images of a memory directory.
+
+    Args:
+        directory(str): The directory holding one image per file.
+
+    Returns:
+        str: The hex digest of the names and contents of the images.
+
+    """
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(directory)):
+        # the names of the frames of a container are part of the memory
+        if not name.endswith(IMAGE_SUFFIXES + (".names", )):
+            continue
+        digest.update(name.encode() + b"\0")
+        with open(os.path.join(directory, name), "rb") as image:
+            digest.update(hashlib.sha256(image.read()).digest())
+    return digest.hexdigest()
+
+
+def _build_entry(directory, entry):
+    """Write the patterns and weights of a memory to a new cache entry"""
+    names, patterns = load_patterns(directory)
+    temporary = entry + f".{os.getpid()}.tmp"
+    os.makedirs(temporary)
+    np.save(os.path.join(temporary, "patterns.npy"), patterns)
+    np.save(os.path.join(temporary, "weights.npy"), build_weights(patterns))
+    with open(os.path.join(temporary, "names.json"), "w") as file:
+        json.dump(names, file)
+    try:
+        # only complete entries ever appear under the final name
+        os.rename(temporary, entry)
+    except OSError:
+        # another process built the same entry first
+        shutil.rmtree(temporary)
+
+
+def load_memory(directory=MEMORY_DIRECTORY, cache=CACHE_DIRECTORY):
+    """
+    Load the patterns and weights of a memory, building them only if the
+    cache has no entry for the current images.
+
+    Args:
+        directory(str): The directory holding one image per file.
+        cache(str): The directory of the cache.
+
+    Returns:
+        tuple: The names of the images, the patterns as rows of an int8
+            matrix and the weight matrix, both memory mapped.
+
+    """
+    entry = os.path.join(cache, memory_hash(directory))
+    if not os.path.isdir(entry):
+        os.makedirs(cache, exist_ok=True)
+        _build_entry(directory, entry)
+
+    with open(os.path.join(entry, "names.json")) as file:
+        names = json.load(file)
+    patterns = np.load(os.path.join(entry, "patterns.npy"), mmap_mode="r")
+    weights = np.load(os.path.join(entry, "weights.npy"), mmap_mode="r")
+    return names, patterns, weights
@@ -0,0 +1,195 @@
+"""
+Evaluates the recall of a Hopfield network for many probes at once. The
+weights are built once from the stored patterns as W = X^T X, including the
+diagonal like hopfield.cpp, and all probes are relaxed together with matrix
+products.
+
+Unlike hopfield.cpp, which flips randomly picked pixels one after the other,
+all pixels are updated at the same time: s <- sign(W s), where a field of
+zero gives +1. A probe is relaxed until it no longer changes or until it
+returns to the state of two sweeps before, which is the two-cycle that
+synchronous updates can run into.
+
+The patterns and weights of the memory are cached, see memory.py.
+
+Usage:
+    python recall.py [-m=<memory directory>] <probe> [...]
+"""
+import os
+
+from sys import argv
+
+import numpy as np
+
+from frames import FrameReader, names_path
+
+MEMORY_DIRECTORY = "memory"
+IMAGE_SUFFIXES = (".dat", ".hfb")
+MAX_SWEEPS = 100
+
+
+def read_image(path):
+    """
+    Read a ±1 image from a text file or the first frame of a container.
+
+    Args:
+        path(str): The path of the image.
+
+    Returns:
+        np.ndarray: The image as int8.
+
+    """
+    if path.endswith(".hfb"):
+        return FrameReader(path)[0]
+    return np.loadtxt(path).astype(np.int8)
+
+
+def load_patterns(directory=MEMORY_DIRECTORY):
+    """
+    Read the stored patterns. Every frame of a container is a pattern of its
+    own, named by the '.names' file next to it if there is one.
+
+    Args:
+        directory(str): The directory holding the images.
+
+    Returns:
+        tuple: The names of the patterns and the patterns as rows of an int8
+            matrix.
+
+    Raises:
+        ValueError: If the images differ in shape.
+
+    """
+    names, patterns = [], []
+    shape = None
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.endswith(".hfb"):
+            images = FrameReader(path).read_all()
+        elif name.endswith(IMAGE_SUFFIXES):
+            images = read_image(path)[np.newaxis]
+        else:
+            continue
+        if shape is None:
+            shape = images.shape[1:]
+        elif images.shape[1:] != shape:
+            raise ValueError(f"{path} holds images of shape {images.shape[1:]}, "
+                             f"the other patterns have shape {shape}")
+
+        if name.endswith(".hfb"):
+            if os.path.exists(names_path(path)):
+                with open(names_path(path)) as file:
+                    names.extend(line.strip() for line in file)
+            else:
+                names.extend(f"{name}[{index}]" for index in range(len(images)))
+        else:
+            names.append(name)
+        patterns.extend(images.reshape(len(images), -1))
+    return names, np.array(patterns, dtype=np.int8)
+
+
+def build_weights(patterns):
+    """
+    Build the weight matrix of the stored patterns.
+
+    Args:
+        patterns(np.ndarray): The patterns as rows.
+
+    Returns:
+        np.ndarray: The weights as a float32 matrix, exact for up to 2^24
+            patterns.
+
+    """
+    patterns = patterns.astype(np.float32)
+    return patterns.T @ patterns
+
+
+def relax(probes, weights, max_sweeps=MAX_SWEEPS):
+    """
+    Relax a batch of probes with synchronous updates.
+
+    Args:
+        probes(np.ndarray): The probes as rows of ±1 values.
+        weights(np.ndarray): The weight matrix.
+        max_sweeps(int): The most updates of every probe.
+
+    Returns:
+        tuple: The final states as int8 rows, the number of sweeps of every
+            probe and whether it reached a fixed point.
+
+    """
+    states = probes.astype(np.float32)
+    previous = np.full_like(states, np.nan)
+    sweeps = np.zeros(len(states), dtype=int)
+    converged = np.zeros(len(states), dtype=bool)
+    active = np.arange(len(states))
+
+    for _ in range(max_sweeps):
+        if active.size == 0:
+            break
+        fields = states[active] @ weights
+        new_states = np.where(fields < 0, -1, 1).astype(np.float32)
+        sweeps[active] += 1
+
+        fixed = np.all(new_states == states[active], axis=1)
+        cycling = np.all(new_states == previous[active], axis=1)
+        converged[active[fixed]] = True
+        previous[active] = states[active]
+        states[active] = new_states
+        active = active[~(fixed | cycling)]
+
+    return states.astype(np.int8), sweeps, converged
+
+
+def overlaps(states, patterns):
+    """
+    Compute the overlap of states with the stored patterns.
+
+    Args:
+        states(np.ndarray): The states as rows.
+        patterns(np.ndarray): The patterns as rows.
+
+    Returns:
+        np.ndarray: The overlap between -1 and 1 of every state with every
+            pattern.
+
+    """
+    return states.astype(np.float32) @ patterns.T.astype(np.float32) \
+           / patterns.shape[1]
+
+
+def main():
+    """Relax the probes given on the command line and print a summary. """
+    # imported here, the cache builds on the functions of this module
+    from memory import load_memory
+
+    memory = MEMORY_DIRECTORY
+    paths = []
+    for arg in argv[1:]:
+        if arg.startswith("-m="):
+            memory = arg.split("=")[1]
+        else:
+            paths.append(arg)
+    if not paths:
+        print(__doc__)
+        return
+
+    names, patterns, weights = load_memory(memory)
+    probes = np.array([read_image(path).reshape(-1) for path in paths])
+    if probes.ndim != 2 or probes.shape[1] != patterns.shape[1]:
+        raise ValueError(f"the probes need {patterns.shape[1]} pixels like "
+                         f"the stored patterns")
+    states, sweeps, converged = relax(probes, weights)
+    before, after = overlaps(probes, patterns), overlaps(states, patterns)
+
+    print("probe".ljust(30), "recalled".ljust(20), "overlap before / after",
+          "sweeps")
+    for index, path in enumerate(paths):
+        best = int(np.argmax(np.abs(after[index])))
+        print(os.path.basename(path).ljust(30), names[best].ljust(20),
+              f"{before[index, best]:+.3f} / {after[index, best]:+.3f}".ljust(22),
+              sweeps[index], "" if converged[index] else "(not converged)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Runs the hopfield binary on every test probe in parallel. Each probe gets its
+own working directory, so the fixed file names the binary writes never
+collide. The workers of the pool import matplotlib once and render the
+progress of every run they handle. The final states are compared with the
+stored patterns and a summary table is written to the output directory.
+
+Usage:
+    python run_tests.py [-j=<workers>] [<probe> ...]
+
+Without probes all files in tests/inputs are run. The binary is built with
+make if it is missing or older than hopfield.cpp.
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+from sys import argv
+from time import perf_counter
+
+import numpy as np
+
+BINARY = "build/hopfield"
+SOURCE = "hopfield.cpp"
+INPUT_DIRECTORY = "tests/inputs"
+OUTPUT_DIRECTORY = "tests/outputs"
+SUMMARY_FILE = "summary.txt"
+
+
+def _preload():
+    """Import matplotlib with a non-interactive backend in a worker"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import input_to_output
+
+
+def build_binary(binary=BINARY, source=SOURCE):
+    """
+    Build the binary with make unless it is newer than its source.
+
+    Args:
+        binary(str): The path of the hopfield binary.
+        source(str): The path of the C++ source.
+
+    """
+    if os.path.exists(binary) \
+            and os.path.getmtime(binary) >= os.path.getmtime(source):
+        return
+    print(f"building {binary}")
+    subprocess.run(["make", binary], check=True)
+
+
+def run_probe(probe, binary, memory, outputs):
+    """
+    Run the binary on one probe in a fresh working directory and render its
+    progress.
+
+    Args:
+        probe(str): The path of the probe.
+        binary(str): The path of the hopfield binary.
+        memory(str): The directory of the stored patterns.
+        outputs(str): The directory to copy the results to.
+
+    Returns:
+        dict: The name of the probe, the final state and the seconds spent
+            in the binary and on rendering.
+
+    """
+    from input_to_output import plot_progress
+    from recall import read_image
+
+    name = os.path.splitext(os.path.basename(probe))[0]
+    with tempfile.TemporaryDirectory(prefix=f"hopfield_{name}_") as work:
+        os.symlink(os.path.abspath(memory), os.path.join(work, "memory"))
+        os.mkdir(os.path.join(work, "progress"))
+
+        start = perf_counter()
+        subprocess.run([os.path.abspath(binary), os.path.abspath(probe)],
+                       cwd=work, check=True, stdout=subprocess.DEVNULL)
+        run_time = perf_counter() - start
+
+        start = perf_counter()
+        plot_progress(os.path.join(work, "progress", "progress.hfb"),
+                      os.path.join(outputs, f"{name}.png"))
+        render_time = perf_counter() - start
+
+        shutil.copy(os.path.join(work, "input_end.dat"),
+                    os.path.join(outputs, f"{name}.out"))
+        state = read_image(os.path.join(work, "input_end.dat"))
+
+    return {"name": name, "state": state, "run time": run_time,
+            "render time": render_time}
+
+
+def summarise(results, names, patterns):
+    """
+    Format a table of the recalled pattern and timings of every probe.
+
+    Args:
+        results(list): The results of run_probe.
+        names(list): The names of the stored patterns.
+        patterns(np.ndarray): The stored patterns as rows.
+
+    Returns:
+        str: The table.
+
+    """
+    lines = ["probe".ljust(30) + "recalled".ljust(20)
+             + "overlap".rjust(8) + "run [s]".rjust(10) + "render [s]".rjust(12)]
+    for result in results:
+        overlap = patterns.astype(np.float32) @ result["state"].reshape(-1) \
+                  / patterns.shape[1]
+        best = int(np.argmax(np.abs(overlap)))
+        lines.append(result["name"].ljust(30) + names[best].ljust(20)
+                     + f"{overlap[best]:+.3f}".rjust(8)
+                     + f"{result['run time']:.2f}".rjust(10)
+                     + f"{result['render time']:.2f}".rjust(12))
+    return "\n".join(lines)
+
+
+def main():
+    """Run the probes and write the summary. """
+    from recall import MEMORY_DIRECTORY, load_patterns
+
+    workers = None
+    probes = []
+    for arg in argv[1:]:
+        if arg.startswith("-j="):
+            workers = int(arg.split("=")[1])
+        else:
+            probes.append(arg)
+    probes = probes or sorted(glob(os.path.join(INPUT_DIRECTORY, "*")))
+    if not probes:
+        print(__doc__)
+        return
+    build_binary()
+
+    os.makedirs(OUTPUT_DIRECTORY, exist_ok=True)
+    start = perf_counter()
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_preload) as executor:
+        futures = [executor.submit(run_probe, probe, BINARY, MEMORY_DIRECTORY,
+                                   OUTPUT_DIRECTORY) for probe in probes]
+        results = [future.result() for future in futures]
+
+    names, patterns = load_patterns(MEMORY_DIRECTORY)
+    summary = summarise(results, names, patterns)
+    with open(os.path.join(OUTPUT_DIRECTORY, SUMMARY_FILE), "w") as file:
+        file.write(summary + "\n")
+    print(summary)
+    print(f"{len(results)} probes in {perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Checks that images of another shape than the stored patterns are rejected by
+recall.py and by the hopfield binary instead of being read out of bounds.
+
+Usage:
+    python -m pytest test_shapes.py
+"""
+import os
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from frames import FrameWriter
+from recall import load_patterns
+
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      "hopfield.cpp")
+
+
+def write_container(path, shape, nframes=2):
+    """Write random ±1 frames of a shape to a container"""
+    writer = FrameWriter(path, shape)
+    for step in range(nframes):
+        writer.append(np.random.choice([-1, 1], shape), step)
+    writer.close()
+
+
+def test_load_patterns_rejects_mixed_shapes(tmp_path):
+    write_container(tmp_path / "a.hfb", (100, 100))
+    write_container(tmp_path / "b.hfb", (50, 50))
+    with pytest.raises(ValueError, match="shape"):
+        load_patterns(tmp_path)
+
+
+def test_load_patterns_rejects_mixed_text_images(tmp_path):
+    np.savetxt(tmp_path / "a.dat", np.ones((10, 10)), fmt="%i")
+    np.savetxt(tmp_path / "b.dat", np.ones((10, 8)), fmt="%i")
+    with pytest.raises(ValueError, match="shape"):
+        load_patterns(tmp_path)
+
+
+@pytest.fixture(scope="module")
+def binary(tmp_path_factory):
+    """The hopfield binary built from the current source"""
+    if shutil.which("g++") is None:
+        pytest.skip("g++ is not installed")
+    path = tmp_path_factory.mktemp("build") / "hopfield"
+    subprocess.run(["g++", SOURCE, "-o", str(path), "-lm", "--std=c++17"],
+                   check=True)
+    return path
+
+
+@pytest.mark.parametrize("memory_shape, probe_shape",
+                         [((50, 50), (100, 100)), ((100, 100), (50, 50))])
+def test_binary_rejects_other_shapes(binary, tmp_path, memory_shape,
+                                     probe_shape):
+    (tmp_path / "memory").mkdir()
+    (tmp_path / "progress").mkdir()
+    write_container(tmp_path / "memory" / "patterns.hfb", memory_shape)
+    np.savetxt(tmp_path / "probe.dat", np.ones(probe_shape), fmt="%i")
+
+    result = subprocess.run([str(binary), str(tmp_path / "probe.dat")],
+                            cwd=tmp_path, capture_output=True, text=True,
+                            timeout=60)
+    assert result.returncode != 0
+    assert "50x50" in result.stderr or "100x100" in result.stderr
@@ -1,6 +1,68 @@
+import numpy as np
 
 
+def input_weights(nbits):
+    """
+    The weights turning nbits inputs into the row of a truth table.
+
+    Args:
+        nbits(int): The number of inputs.
+
+    Returns:
+        np.ndarray: The powers of two, the first input being the most
+            significant bit.
+
+    """
+    return 1 << np.arange(nbits - 1, -1, -1, dtype=np.int64)
+
+
+def random_truth_tables(number_of_functions, nbits, bias=0.5):
+    """
+    Draw random boolean functions as truth tables.
+
+    Args:
+        number_of_functions(int): The number of functions.
+        nbits(int): The number of inputs of every function.
+        bias(float): The probability of an output being 1.
+
+    Returns:
+        np.ndarray: The outputs as an uint8 array of shape
+            (number_of_functions, 2^nbits).
+
+    """
+    return (np.random.random((number_of_functions, 2 ** nbits)) < bias
+            ).astype(np.uint8)
+
 
 class BooleanFunction:
-    def __init__(self, nbits):
-        
+    """A boolean function of nbits inputs stored as a truth table"""
+
+    def __init__(self, nbits, table=None):
+        """
+        Args:
+            nbits(int): The number of inputs.
+            table(np.ndarray or None): The 2^nbits outputs. Defaults to None
+                meaning a random function.
+
+        """
+        self.nbits = nbits
+        if table is None:
+            table = random_truth_tables(1, nbits)[0]
+        self.table = np.asarray(table, dtype=np.uint8)
+        if self.table.shape != (2 ** nbits, ):
+            raise ValueError(f"a function of {nbits} inputs needs "
+                             f"{2 ** nbits} outputs")
+        self.weights = input_weights(nbits)
+
+    def __call__(self, inputs):
+        """
+        Evaluate the function.
+
+        Args:
+            inputs(np.ndarray): The inputs along the last axis.
+
+        Returns:
+            np.ndarray: The outputs.
+
+        """
+        return self.table[np.asarray(inputs) @ self.weights]
@@ -1,35 +1,106 @@
 import numpy as np
 
+from boolean_functions import input_weights, random_truth_tables
+
 N = 20
 K = 2
 
 
 class BooleanNetwork:
     def __init__(self, number_of_nodes, number_of_connections):
-        self.nodes = np.random.randint(0, 2, (number_of_nodes, ))
+        self.nodes = np.random.randint(0, 2, (number_of_nodes, )).astype(np.uint8)
         # array storing the indices of k edges for each node
         self.connections = np.random.randint(
             0, number_of_nodes, (number_of_nodes, number_of_connections)
         )
-        # array storing the indices of the boolean functions for each possible
-        # node combination
-        self.function_choices = np.random.randint(
-            0, 2, (number_of_nodes, number_of_connections, number_of_connections)
-        )
-        self.boolean_functions = np.empty((2, number_of_connections, number_of_connections), dtype=int)
-        self.boolean_functions[0, :] = np.zeros((number_of_connections, number_of_connections))
-        self.boolean_functions[1, :] = np.ones((number_of_connections, number_of_connections))
+        # array storing the output of the boolean function of each node for
+        # every combination of its inputs, the first input being the most
+        # significant bit of the row
+        self.truth_tables = random_truth_tables(number_of_nodes,
+                                                number_of_connections)
+        self.weights = input_weights(number_of_connections)
         self.time = 0
 
-    def _update_once(self):
-        new_state = np.empty(self.nodes.shape, dtype=int)
-        for node_position in range(self.nodes.shape[0]):
-            ingoing_nodes = self.connections[node_position]
-            #new_state[node_position] = self.boolean_functions[self.function_choices[*ingoing_nodes], *ingoing_nodes]
+    def next_state(self, nodes):
+        """
+        Compute the synchronous update of a state without changing the
+        network.
+
+        Args:
+            nodes(np.ndarray): The state of every node.
 
-        self.nodes = new_state
+        Returns:
+            np.ndarray: The state after one update.
+
+        """
+        # gather the inputs of all nodes at once and pack them into the row of
+        # the truth table
+        rows = nodes[self.connections] @ self.weights
+        return self.truth_tables[np.arange(len(nodes)), rows]
+
+    def _update_once(self):
+        self.nodes = self.next_state(self.nodes)
         self.time += 1
 
+    def _advance(self, state):
+        """Update a state and its bits packed into bytes, which compare
+        quickly"""
+        nodes = self.next_state(state[0])
+        return nodes, np.packbits(nodes).tobytes()
+
+    def find_attractor(self, max_steps=None):
+        """
+        Find the attractor reached from the current state with Brent's cycle
+        detection. Only a few states are kept while searching, so the memory
+        grows with the length of the cycle alone. The network itself is not
+        updated.
+
+        Args:
+            max_steps(int or None): The most updates to search for the cycle.
+                Defaults to None meaning no limit.
+
+        Returns:
+            tuple: The length of the transient, the length of the cycle and
+                the states of the cycle as rows of bits packed with
+                np.packbits, starting with the first state on the cycle.
+
+        """
+        start = self.nodes, np.packbits(self.nodes).tobytes()
+
+        # find the length of the cycle by moving the tortoise to the hare
+        # whenever the hare has taken a power of two steps
+        power = cycle_length = 1
+        tortoise = start
+        hare = self._advance(start)
+        steps = 1
+        while tortoise[1] != hare[1]:
+            if max_steps is not None and steps >= max_steps:
+                raise RuntimeError(f"no attractor within {max_steps} steps")
+            if power == cycle_length:
+                tortoise = hare
+                power *= 2
+                cycle_length = 0
+            hare = self._advance(hare)
+            cycle_length += 1
+            steps += 1
+
+        # a hare cycle_length steps ahead meets the tortoise where the cycle
+        # starts
+        tortoise = hare = start
+        for _ in range(cycle_length):
+            hare = self._advance(hare)
+        transient = 0
+        while tortoise[1] != hare[1]:
+            tortoise = self._advance(tortoise)
+            hare = self._advance(hare)
+            transient += 1
+
+        states = [np.packbits(tortoise[0])]
+        for _ in range(cycle_length - 1):
+            tortoise = self._advance(tortoise)
+            states.append(np.packbits(tortoise[0]))
+        return transient, cycle_length, np.array(states)
+
     def update(self, timesteps=1):
         for timestep in range(timesteps):
             self._update_once()
@@ -44,8 +115,8 @@ with nodes
 {self.nodes}
 and connections
 {self.connections}
-and boolean functions for each node
-{self.function_choices}
+and truth tables for each node
+{self.truth_tables}
 """)
 
 
@@ -57,3 +128,6 @@ if __name__ == "__main__":
         new_network.update()
 
     new_network.print_state()
+    transient, cycle_length, states = new_network.find_attractor()
+    print(f"attractor of length {cycle_length} after {transient} steps:")
+    print(np.unpackbits(states, axis=1, count=N))
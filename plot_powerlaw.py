@@ -1,48 +1,75 @@
-from scipy.optimize import curve_fit
+from sys import argv
+
 import numpy as np
 
 import matplotlib.pyplot as plt
 
-from uncertainties import ufloat
-
-LOG_BINS = 30
+from scipy.special import zeta
 
+from analysis.avalanches import log_histogram
+from analysis.cache import load_table
+from analysis.powerlaw import (bootstrap_power_law, confidence_interval,
+                               fit_power_law)
 
-def lin_func(x, a, b):
-    return a * x + b
+LOG_BINS = 30
+DEFAULT_PATH = "avalanche_sizes.dat"
+DEFAULT_BOOTSTRAPS = 1000
 
 def power_law(x, a, b):
     return b * x ** a
 
-if __name__ == "__main__":
-    avalanches = np.loadtxt("avalanche_sizes.dat")
+
+def main():
+    """
+    Plot the distribution of avalanches together with a maximum likelihood
+    fit of a power law. The file is given as a command line argument, either
+    the text output of forestfire_main.py or the binary output of a streaming
+    run (.bin), and is read in chunks. The counted values are cached, so a
+    rerun only reads what was appended since. The number of bootstrap
+    samples for the errors of the fit can be set with -n=<samples>.
+    """
+    path = DEFAULT_PATH
+    nbootstraps = DEFAULT_BOOTSTRAPS
+    for arg in argv[1:]:
+        if arg.startswith("-n="):
+            nbootstraps = int(arg.split("=")[1])
+        else:
+            path = arg
+    values, value_counts = load_table(path).get()
+    # fitted like the histogram to the avalanche sizes + 1
+    fit = fit_power_law(values, value_counts)
+    bootstrap = bootstrap_power_law(values, value_counts, nbootstraps)
+    lower, upper = confidence_interval(bootstrap["alpha"])
 
     fig = plt.figure()
     ax = fig.add_subplot(111)
 
+    counts, bin_edges, bin_centres = log_histogram(values, value_counts,
+                                                   LOG_BINS)
 
-    counts, bin_edges = np.histogram(avalanches + 1, bins=np.logspace(0, np.log10(np.max(avalanches)), LOG_BINS))
-    counts = counts / np.diff(bin_edges)
-    bin_centres = np.sqrt(bin_edges[1:] * bin_edges[:-1])
-
-    params, pcov = curve_fit(lin_func, np.log(bin_centres), np.log(counts + 1))
-    perr = np.sqrt(np.diag(pcov))
     ax.bar(bin_centres, counts, width=np.diff(bin_edges))
 
-    ax.plot(bin_centres, power_law(bin_centres, -1.5, 10 ** 3), zorder=1, color="red")
+    x_min = fit["x min"] + 1
+    tail = bin_centres[bin_centres >= x_min]
+    ax.plot(tail, power_law(tail, -fit["alpha"],
+                            fit["tail size"] / zeta(fit["alpha"], x_min)),
+            zorder=1, color="red")
 
     ax.set_title("Linearised avalanche distribution\nt = 100.000, n = 64x64")
     ax.set_xlabel("Avalanche duration")
     ax.set_ylabel("Frequency")
     ax.set_xscale("log")
     ax.set_yscale("log")
-    a, b = ufloat(params[0], perr[0]), ufloat(params[1], perr[1])
-    print(a, b)
+    print(f"alpha = {fit['alpha']:.4f}, 95% interval [{lower:.4f}, "
+          f"{upper:.4f}] from {nbootstraps} bootstrap samples")
+    print(f"x_min = {fit['x min']:.0f}, {fit['tail size']} avalanches above, "
+          f"KS distance {fit['ks distance']:.4f}")
 
     textstr = '\n'.join((
-        "$f(x) = ax + b$",
-        "$a = -1.5$",
-        "$b = 3$",
+        "$p(x) \\propto x^{-\\alpha}$",
+        f"$\\alpha = {fit['alpha']:.3f}_{{-{fit['alpha'] - lower:.3f}}}"
+        f"^{{+{upper - fit['alpha']:.3f}}}$",
+        f"$x_{{min}} = {fit['x min']:.0f}$",
     ))
 
     props = dict(boxstyle='round', alpha=1, color="darkgrey")
@@ -51,3 +78,7 @@ if __name__ == "__main__":
             verticalalignment='top', bbox=props)
     plt.savefig("power_law.png", dpi=200)
     plt.show()
+
+
+if __name__ == "__main__":
+    main()
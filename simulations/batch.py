@@ -0,0 +1,208 @@
+"""
+Contains routines for running batches of simulations without the graphical
+user interface. The results of each job are stored in a local cache under a
+hash of the model, its parameters, the seed and the number of updates, so
+identical jobs are only ever run once.
+
+A job file is a JSON document of the form
+
+    {
+        "cache": "results",
+        "workers": 4,
+        "jobs": [
+            {"model": "baksneppen", "parameters": {"size": 64, "updatemode": 1},
+             "seed": 1, "nupdates": 100000},
+            {"model": "forestfire", "parameters": {"size": 64},
+             "seed": 1, "nupdates": 1000}
+        ]
+    }
+"""
+import hashlib
+import json
+import os
+import random
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+DEFAULT_CACHE = "results"
+JOB_KEYS = ("model", "parameters", "seed", "nupdates")
+
+
+def build_baksneppen(parameters):
+    """Create a Bak-Sneppen model from the parameters of a job. """
+    from baksneppen.model import BakSneppenModel
+
+    parameters = dict(parameters)
+    updatemode = parameters.pop("updatemode", 1)
+    model = BakSneppenModel(**parameters)
+    model.set_updatemode(updatemode)
+    return model
+
+
+def build_forestfire(parameters):
+    """Create a forest fire model from the parameters of a job. """
+    from forestfire.model import ForestFireModel
+
+    return ForestFireModel(**parameters)
+
+
+MODELS = {
+    "baksneppen": build_baksneppen,
+    "forestfire": build_forestfire
+}
+
+
+def normalise_job(job):
+    """
+    Check a job and fill in the optional entries.
+
+    Args:
+        job(dict): The job as read from the job file.
+
+    Returns:
+        dict: The job containing exactly the keys in JOB_KEYS.
+
+    """
+    if job.get("model") not in MODELS:
+        raise ValueError(f"Unknown model '{job.get('model')}', expected one "
+                         f"of {', '.join(MODELS)}")
+    for key in ("seed", "nupdates"):
+        if not isinstance(job.get(key), int):
+            raise ValueError(f"Job {job} needs an integer '{key}'")
+    return {
+        "model": job["model"],
+        "parameters": dict(job.get("parameters", {})),
+        "seed": job["seed"],
+        "nupdates": job["nupdates"]
+    }
+
+
+def job_hash(job):
+    """
+    Compute the key under which the results of a job are cached.
+
+    Args:
+        job(dict): A normalised job.
+
+    Returns:
+        str: The hexadecimal sha256 digest of the job.
+
+    """
+    canonical = json.dumps(job, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def result_path(job, cache):
+    """Get the path of the cached results of a job. """
+    return os.path.join(cache, job_hash(job) + ".npz")
+
+
+def load_result(job, cache=DEFAULT_CACHE):
+    """
+    Load the cached results of a job.
+
+    Args:
+        job(dict): The job.
+        cache(str): The directory containing the cached results.
+
+    Returns:
+        dict: The data of the model at the end of the run.
+
+    """
+    with np.load(result_path(normalise_job(job), cache)) as stored:
+        return {key: stored[key] for key in stored.files if key != "job"}
+
+
+def run_job(job, cache):
+    """
+    Run a single job and store the data of the model in the cache.
+
+    Args:
+        job(dict): A normalised job.
+        cache(str): The directory to store the results in.
+
+    Returns:
+        str: The path of the stored results.
+
+    """
+    random.seed(job["seed"])
+    np.random.seed(job["seed"])
+    model = MODELS[job["model"]](job["parameters"])
+    try:
+        for _ in range(job["nupdates"]):
+            model.update()
+    finally:
+        # the parallel backends of the forest fire keep threads, processes
+        # and shared memory until they are released, the data is read
+        # afterwards so it holds no views of the freed memory
+        if hasattr(model, "release_workers"):
+            model.release_workers()
+
+    data = {key: np.asarray(value) for key, value in model.get_data().items()}
+    path = result_path(job, cache)
+    temporary_path = path + f".{os.getpid()}.tmp.npz"
+    np.savez(temporary_path, job=json.dumps(job), **data)
+    # only complete results ever appear under the final name
+    os.replace(temporary_path, path)
+    return path
+
+
+def run_batch(jobs, cache=DEFAULT_CACHE, workers=None):
+    """
+    Run all jobs whose results are not cached yet on a process pool.
+
+    Args:
+        jobs(list): The jobs to run.
+        cache(str): The directory to store the results in.
+        workers(int or None): The number of processes. Defaults to None
+            meaning one process per cpu.
+
+    Returns:
+        dict: The path of the results for every job hash.
+
+    """
+    os.makedirs(cache, exist_ok=True)
+    jobs = [normalise_job(job) for job in jobs]
+    results = {}
+    pending = {}
+    for job in jobs:
+        key = job_hash(job)
+        if key in results or key in pending:
+            continue
+        if os.path.exists(result_path(job, cache)):
+            print(f"cached  {key[:12]} {job['model']} {job['parameters']}")
+            results[key] = result_path(job, cache)
+        else:
+            pending[key] = job
+
+    if not pending:
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_job, job, cache): key
+                   for key, job in pending.items()}
+        for future in as_completed(futures):
+            key = futures[future]
+            results[key] = future.result()
+            job = pending[key]
+            print(f"done    {key[:12]} {job['model']} {job['parameters']}")
+    return results
+
+
+def read_job_file(path):
+    """
+    Read a job file.
+
+    Args:
+        path(str): The path of the JSON job file.
+
+    Returns:
+        tuple: The jobs, the cache directory and the number of workers.
+
+    """
+    with open(path) as job_file:
+        content = json.load(job_file)
+    return (content["jobs"], content.get("cache", DEFAULT_CACHE),
+            content.get("workers"))
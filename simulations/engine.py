@@ -1,27 +1,42 @@
 import tkinter as tk
 
+from time import perf_counter
+
 from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg, NavigationToolbar2Tk)
 from matplotlib.figure import Figure
 
 DEFAULT_WINDOW_TITLE = "Simulation"
+DEFAULT_TARGET_FRAME_TIME = 1 / 30
+MAX_STEPS_PER_FRAME = 1_000_000
+# weight of the newest measurement in the running averages of the costs
+COST_SMOOTHING = 0.3
 
 
 class SimulationEngine(tk.Tk):
-    """Base class for physical model simulations"""
+    """
+    Base class for physical model simulations. Subclasses provide the
+    attributes 'model', 'timeText' and 'silent' as well as a 'visualise'
+    method.
+    """
 
-    def __init__(self, window_title=None, icon=None):
+    def __init__(self, window_title=None, icon=None, target_frame_time=None):
         """
         Initialise a new model class.
 
         Args:
             window_title(str or None): The title of the tkinter window. Defaults
                 to None meaning the default window title will be used.
-            quit_row(int): The row to place the quit button.
-            quit_col(int): The column to place the quit button.
+            icon(str or None): Path to the icon of the window.
+            target_frame_time(float or None): The time in seconds one frame,
+                that is the model updates and a redraw, should take.
 
         """
         super().__init__()
 
+        self.target_frame_time = target_frame_time if target_frame_time is not None \
+                                 else DEFAULT_TARGET_FRAME_TIME
+        self.reset_frame_pacing()
+
         if icon is not None:
             self.iconbitmap(icon)
 
@@ -46,6 +61,57 @@ class SimulationEngine(tk.Tk):
     def update_figure(self):
         self.canvas.draw()
 
+    def simulate(self):
+        """Advance the simulation by one frame and schedule the next one. """
+        if self.running:
+            start = perf_counter()
+            for _ in range(self.steps_per_frame):
+                self.model.update()
+            step_time = perf_counter() - start
+
+            self.timeText.set(f"t = {self.model.time}")
+            if not self.silent:
+                start = perf_counter()
+                self.visualise()
+                self._measure_frame_cost(perf_counter() - start)
+            self._measure_step_cost(step_time / self.steps_per_frame)
+            self.adapt_steps_per_frame()
+            self.after(1, self.simulate)
+
+    def reset_frame_pacing(self):
+        """
+        Forget the measured costs and start again with one update per frame,
+        e.g. after the model was restarted or resized.
+        """
+        self.steps_per_frame = 1
+        self.step_cost = None
+        self.frame_cost = 0.0
+
+    def _measure_step_cost(self, step_cost):
+        """Add the time one model update took to the running average"""
+        if self.step_cost is None:
+            self.step_cost = step_cost
+        else:
+            self.step_cost += COST_SMOOTHING * (step_cost - self.step_cost)
+
+    def _measure_frame_cost(self, frame_cost):
+        """Add the time one redraw took to the running average"""
+        self.frame_cost += COST_SMOOTHING * (frame_cost - self.frame_cost)
+
+    def adapt_steps_per_frame(self):
+        """
+        Choose the number of model updates between two redraws so that one
+        frame takes about the target frame time. At least half of the frame
+        time is left to the model, so a slow redraw cannot stall it. The
+        number of updates at most doubles per frame to damp noisy timings.
+        """
+        frame_cost = 0.0 if self.silent else self.frame_cost
+        budget = max(self.target_frame_time - frame_cost,
+                     self.target_frame_time / 2)
+        steps = min(int(budget / max(self.step_cost, 1e-9)),
+                    2 * self.steps_per_frame)
+        self.steps_per_frame = min(max(steps, 1), MAX_STEPS_PER_FRAME)
+
     def exit(self):
         """Close the window"""
         self.quit()
@@ -0,0 +1,265 @@
+"""
+Contains a local asyncio server reporting live metrics and state snapshots of
+a simulation running without the graphical user interface.
+
+The server runs its event loop in a daemon thread and only reads from the
+model when a client asks for data, so an unobserved simulation is not slowed
+down. Data is served as JSON over HTTP, either on a TCP port or on a unix
+socket:
+
+    GET /metrics   - the metrics of the simulation
+    GET /snapshot  - a downsampled copy of the state of the model
+"""
+import asyncio
+import json
+import os
+import threading
+
+from time import perf_counter
+
+import numpy as np
+
+DEFAULT_HOST = "localhost"
+SNAPSHOT_SIZE = 64
+# seconds to wait for the server to listen
+START_TIMEOUT = 10
+UNIX_PREFIX = "unix:"
+
+
+def parse_address(address):
+    """
+    Translate a user supplied address into a host and port or a socket path.
+
+    Args:
+        address(str): Either a port ('8765'), a host and port
+            ('0.0.0.0:8765') or a unix socket ('unix:/tmp/run.sock').
+
+    Returns:
+        tuple: The host and port or None and the path of the unix socket.
+
+    """
+    if address.startswith(UNIX_PREFIX):
+        return None, address[len(UNIX_PREFIX):]
+    host, _, port = address.rpartition(":")
+    return host or DEFAULT_HOST, int(port)
+
+
+def downsample(array, max_size=SNAPSHOT_SIZE):
+    """
+    Reduce an array by taking every n-th entry along each axis.
+
+    Args:
+        array(np.ndarray): The array to reduce.
+        max_size(int): The maximum number of entries along each axis.
+
+    Returns:
+        list: The reduced array as nested lists.
+
+    """
+    strides = tuple(slice(None, None, max(1, -(-n // max_size)))
+                    for n in array.shape)
+    return array[strides].tolist()
+
+
+def histogram(values, bins):
+    """
+    Compute a histogram in a form which can be serialised.
+
+    Args:
+        values(array-like): The values to count.
+        bins(np.ndarray): The edges of the bins.
+
+    Returns:
+        dict: The edges of the bins and the counts per bin.
+
+    """
+    counts, edges = np.histogram(np.asarray(values), bins)
+    return {"bins": edges.tolist(), "counts": counts.tolist()}
+
+
+class RunningHistogram:
+    """
+    Histogram of a growing list which only counts the entries appended since
+    the previous request
+    """
+
+    def __init__(self, bins, offset=0):
+        """
+        Initialise an empty histogram.
+
+        Args:
+            bins(np.ndarray): The edges of the bins.
+            offset(int): The number of leading entries of the list to skip.
+
+        """
+        self.bins = np.asarray(bins)
+        self.offset = offset
+        self.counts = np.zeros(len(self.bins) - 1, dtype=np.int64)
+        self._values = None
+        self._counted = offset
+
+    def update(self, values, final=None):
+        """
+        Count the new entries of a list.
+
+        Args:
+            values(list): The list, which may only grow. If another list or a
+                shorter one is passed, counting starts over.
+            final(int or None): The number of entries which no longer change.
+                Later entries are counted for this request only. Defaults to
+                None meaning all entries.
+
+        Returns:
+            dict: The edges of the bins and the counts per bin.
+
+        """
+        end = len(values)
+        final = end if final is None else final
+        if values is not self._values or final < self._counted:
+            self._values = values
+            self._counted = self.offset
+            self.counts[:] = 0
+        if final > self._counted:
+            self.counts += np.histogram(
+                np.asarray(values[self._counted:final]), self.bins)[0]
+            self._counted = final
+
+        counts = self.counts
+        if end > max(final, self.offset):
+            counts = counts + np.histogram(
+                np.asarray(values[max(final, self.offset):end]), self.bins)[0]
+        return {"bins": self.bins.tolist(), "counts": counts.tolist()}
+
+
+class MonitorServer:
+    """Serves metrics of a running simulation to local clients"""
+
+    def __init__(self, model, describe, snapshot, address):
+        """
+        Initialise the server.
+
+        Args:
+            model(object): The model of the simulation. It needs a 'time'
+                attribute counting the updates.
+            describe(callable): Returns a dictionary of metrics for the model.
+            snapshot(callable): Returns a serialisable snapshot of the state
+                of the model.
+            address(str): The address to listen on, see parse_address.
+
+        """
+        self.model = model
+        self.describe = describe
+        self.snapshot = snapshot
+        self.host, self.port = parse_address(address)
+        self._last_sample = (perf_counter(), model.time)
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._error = None
+
+    def start(self):
+        """
+        Start serving in a background thread.
+
+        Raises:
+            OSError: If the server could not listen on its address.
+            TimeoutError: If the server did not start within START_TIMEOUT
+                seconds.
+
+        """
+        self._loop = asyncio.new_event_loop()
+        self._error = None
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, args=(ready, ),
+                                        daemon=True)
+        self._thread.start()
+        if not ready.wait(START_TIMEOUT):
+            raise TimeoutError(f"the monitor did not start within "
+                               f"{START_TIMEOUT} s")
+        if self._error is not None:
+            self._thread.join()
+            self._thread = None
+            raise self._error
+
+    def stop(self):
+        """Stop the server and wait for its thread to finish. """
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+
+    def _serve(self, ready):
+        """Run the event loop of the server"""
+        asyncio.set_event_loop(self._loop)
+        if self.host is None:
+            start = asyncio.start_unix_server(self._handle, path=self.port)
+        else:
+            start = asyncio.start_server(self._handle, self.host, self.port)
+        try:
+            self._server = self._loop.run_until_complete(start)
+        except Exception as err:
+            # e.g. the address is in use, reported to the caller of start
+            self._error = err
+            self._loop.close()
+            return
+        finally:
+            ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+            if self.host is None and os.path.exists(self.port):
+                os.remove(self.port)
+
+    def get_metrics(self):
+        """
+        Collect the metrics of the model together with the update rate since
+        the previous request.
+
+        Returns:
+            dict: The metrics of the simulation.
+
+        """
+        now, time = perf_counter(), self.model.time
+        last_now, last_time = self._last_sample
+        self._last_sample = (now, time)
+        metrics = {
+            "time": time,
+            "steps per second": (time - last_time) / max(now - last_now, 1e-9)
+        }
+        metrics.update(self.describe(self.model))
+        return metrics
+
+    async def _handle(self, reader, writer):
+        """Answer a single http request"""
+        try:
+            request = await reader.readline()
+            # skip the remaining request headers
+            while (await reader.readline()).strip():
+                pass
+            parts = request.decode("latin-1").split()
+            path = parts[1] if len(parts) > 1 else "/"
+
+            if path in ("/", "/metrics"):
+                status, body = "200 OK", self.get_metrics()
+            elif path == "/snapshot":
+                status, body = "200 OK", {"time": self.model.time,
+                                          "state": self.snapshot(self.model)}
+            else:
+                status, body = "404 Not Found", {"error": f"unknown path {path}"}
+
+            content = json.dumps(body).encode()
+            writer.write("\r\n".join((
+                f"HTTP/1.0 {status}",
+                "Content-Type: application/json",
+                f"Content-Length: {len(content)}",
+                "", ""
+            )).encode("latin-1") + content)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,42 @@
+"""
+Checks that batch jobs release the workers of the parallel backends.
+
+Usage:
+    python -m pytest test_batch.py
+"""
+import multiprocessing as mp
+import os
+
+from simulations.batch import load_result, run_batch, run_job, normalise_job
+
+SHARED_MEMORY = "/dev/shm"
+
+
+def processes_job():
+    return {"model": "forestfire",
+            "parameters": {"size": 32, "backend": "processes", "workers": 2,
+                           "lightning_probability": 0.001,
+                           "tree_growth": 0.05},
+            "seed": 3, "nupdates": 20}
+
+
+def shared_segments():
+    """The names of the shared memory segments of this machine"""
+    if not os.path.isdir(SHARED_MEMORY):
+        return set()
+    return set(os.listdir(SHARED_MEMORY))
+
+
+def test_processes_job_releases_its_workers(tmp_path):
+    before = shared_segments()
+    run_job(normalise_job(processes_job()), str(tmp_path))
+    assert mp.active_children() == []
+    assert shared_segments() <= before
+
+
+def test_processes_job_in_a_batch(tmp_path):
+    before = shared_segments()
+    run_batch([processes_job()], cache=str(tmp_path), workers=1)
+    data = load_result(processes_job(), cache=str(tmp_path))
+    assert int(data["time"]) == 20
+    assert shared_segments() <= before
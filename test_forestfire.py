@@ -0,0 +1,108 @@
+"""
+Checks of the forest fire model which the interface can run into.
+
+Usage:
+    python -m pytest test_forestfire.py
+"""
+import numpy as np
+
+from forestfire import cell_state
+from forestfire.model import ForestFireModel
+
+
+def burning_model(seed=0):
+    """A model with a single row of fire in a forest full of trees"""
+    np.random.seed(seed)
+    model = ForestFireModel(32, 0.0, 0.0, updatemode=1)
+    model.forest[:] = cell_state.TREE
+    model.forest[0] = cell_state.FIRE
+    model.count_cells()
+    return model
+
+
+def test_switching_mode_while_fire_burns_without_avalanches():
+    model = burning_model()
+    model.set_updatemode(1)
+    model.update()
+    assert model.avalanche_sizes == [32]
+    assert model.avalanche_durations == [1]
+
+
+def test_switching_mode_keeps_the_burning_avalanche():
+    reference, model = burning_model(), burning_model()
+    for run in (reference, model):
+        run.set_updatemode(1)
+        run.update()
+    model.set_updatemode(1)
+    for _ in range(40):
+        reference.update()
+        model.update()
+    assert model.avalanche_sizes == reference.avalanche_sizes
+    assert model.avalanche_durations == reference.avalanche_durations
+    assert model.avalanche_sizes[-1] == 32 * 31
+
+
+def test_switching_to_instant_mode_ends_the_avalanche():
+    model = burning_model()
+    model.set_updatemode(1)
+    model.update()
+    model.set_updatemode(2)
+    assert not model.is_in_avalanche
+    model.update()
+    assert model.fire_count == 0
+    assert model.avalanche_sizes == [32]
+
+
+def test_get_data_returns_copies():
+    model = burning_model()
+    model.set_updatemode(1)
+    model.update()
+    data = model.get_data()
+    data["avalanche sizes"][:] = -1
+    data["forest"][:] = cell_state.SOIL
+    data["trees series"][:] = -1
+    assert model.avalanche_sizes == [32]
+    assert model.tree_count == np.count_nonzero(model.forest == cell_state.TREE)
+    assert model.get_data()["trees series"][-1] == model.tree_count
+
+
+def test_resume_without_checkpoint(tmp_path, capsys):
+    from forestfire_main import nogui_simulation
+
+    prefix = str(tmp_path / "run")
+    nogui_simulation(16, 0.001, 0.05, 10, output=prefix, resume=True)
+    assert "No checkpoint found" in capsys.readouterr().out
+    assert not (tmp_path / "run_avalanches.bin").exists()
+
+
+def test_command_line_options_match_exactly(monkeypatch):
+    import forestfire_main
+
+    monkeypatch.setattr(forestfire_main, "argv",
+                        ["forestfire_main.py", "nogui", "--output=resume_run",
+                         "-b=dense-s", "-t=0.5", "-s=abc", "--output"])
+    (use_gui, size, _, tree_probability, _, _, backend, _, output, resume,
+     _) = forestfire_main.parse_command_line_args()
+    assert not use_gui and not resume
+    assert output == "resume_run"
+    assert backend == "dense-s"
+    assert tree_probability == 0.5
+    assert size is None
+
+
+def test_index_of_rare_cells_follows_the_forest():
+    np.random.seed(2)
+    instant = ForestFireModel(64, 1e-4, 0.001, updatemode=2)
+    sparse = ForestFireModel(64, 0.01, 0.002, updatemode=1, backend="sparse")
+    for _ in range(200):
+        instant.update()
+        sparse.update()
+        for model, holder in ((instant, instant), (sparse, sparse.active_front)):
+            cells = model.forest.reshape(-1)
+            for index in (holder.soil_index, holder.tree_index):
+                if index.members is not None:
+                    assert np.array_equal(index.members,
+                                          np.flatnonzero(cells == index.state))
+    tree_count = sparse.tree_count
+    sparse.count_cells()
+    assert sparse.tree_count == tree_count
@@ -0,0 +1,48 @@
+"""
+Checks that the batched power law fits agree with fits of single tables.
+
+Usage:
+    python -m pytest test_powerlaw.py
+"""
+import numpy as np
+
+from analysis import powerlaw
+
+
+def power_law_table(alpha, nvalues, seed=0):
+    """Counted values drawn from a continuous power law rounded down"""
+    rng = np.random.default_rng(seed)
+    values = np.floor((1 - rng.random(nvalues)) ** (-1 / (alpha - 1)))
+    return np.unique(values.astype(np.int64), return_counts=True)
+
+
+def test_fit_recovers_the_exponent():
+    values, counts = power_law_table(2.5, 200_000)
+    fit = powerlaw.fit_power_law(values, counts, shift=0)
+    assert abs(fit["alpha"] - 2.5) < 0.05
+    assert fit["tail size"] >= powerlaw.MIN_TAIL
+
+
+def test_block_of_samples_matches_single_fits():
+    values, counts = power_law_table(2.2, 50_000, seed=1)
+    values, counts, candidates = powerlaw._prepare(values, counts, shift=0)
+    samples = np.random.default_rng(2).multinomial(
+        counts.sum(), counts / counts.sum(), size=5
+    )
+    alpha, index, distance, _ = powerlaw._fit(values, samples, candidates,
+                                              powerlaw.MIN_TAIL)
+    for row, sample in enumerate(samples):
+        single = powerlaw._fit(values, sample[None], candidates,
+                               powerlaw.MIN_TAIL)
+        assert alpha[row] == single[0][0]
+        assert index[row] == single[1][0]
+        assert np.isclose(distance[row], single[2][0], rtol=1e-12)
+
+
+def test_zeta_series_matches_scipy():
+    from scipy.special import zeta
+
+    alpha = np.linspace(1.01, 6.0, 7)[:, None] * np.ones(4)
+    x = np.array([99.0, 100.0, 1e3, 1e6])
+    assert np.allclose(powerlaw._zeta(alpha, x), zeta(alpha, x), rtol=1e-13,
+                       atol=0)